@@ -1,6 +1,83 @@
 import os
+from typing import Dict, List
 from pydantic import BaseSettings
 
 class Settings(BaseSettings):
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key")
     API_V1_STR: str = "/v1"
+
+    # 数据库连接池配置（DB_POOL_SIZE <= 0 时退化为 NullPool，不复用连接）
+    DB_ECHO: bool = False              # 是否打印 SQL 日志
+    DB_POOL_SIZE: int = 20             # 连接池常驻连接数
+    DB_MAX_OVERFLOW: int = 10          # 超出常驻连接数后允许的溢出连接数
+    DB_POOL_TIMEOUT: int = 30          # 获取连接的最长等待秒数
+    DB_POOL_RECYCLE: int = 3600        # 连接回收时间（需小于 MySQL wait_timeout）
+    DB_POOL_PRE_PING: bool = True      # 取出连接前做活性检查
+
+    # 认证用户缓存（按用户名缓存 UserProfile，减少鉴权中间件的数据库查询）
+    USER_CACHE_SIZE: int = 10000       # 最大缓存用户数，<= 0 时禁用
+    USER_CACHE_TTL: int = 60           # 缓存过期秒数
+
+    # 已校验 Token 缓存（按 Token 摘要缓存解析后的 claims，过期时间与 Token 的 exp 一致）
+    TOKEN_CACHE_SIZE: int = 10000      # 最大缓存 Token 数，<= 0 时禁用
+
+    # 密码哈希线程池（bcrypt 为 CPU 密集操作，放到线程池执行避免阻塞事件循环）
+    PASSWORD_HASH_WORKERS: int = 4         # 并发执行 bcrypt 的线程数
+    PASSWORD_HASH_MAX_PENDING: int = 64    # 排队 + 执行中的最大任务数，超过后直接返回 503
+
+    # 日志配置
+    LOG_LEVEL: str = "INFO"            # 控制台日志级别
+    LOG_PATH: str = "./server.log"     # 日志文件路径
+
+    # 旅程导出：服务端游标每批读取的行数，也是流式响应每次写出的行数
+    TRIP_EXPORT_BATCH_SIZE: int = 1000
+
+    # 批量创建旅程
+    TRIP_BULK_BATCH_SIZE: int = 500    # 每条多行 INSERT 的最大行数
+    TRIP_BULK_MAX_ITEMS: int = 10000   # 单次请求最多条目数
+
+    # 只读副本（读写分离）：列表 / 收藏等只读查询轮询副本，副本不可用时回退主库
+    DATABASE_REPLICA_URLS: List[str] = []    # 副本连接串，环境变量中用 JSON 数组
+    DB_REPLICA_RETRY_INTERVAL: int = 30      # 副本连接失败后暂停使用的秒数
+
+    # /trips/list 响应缓存（旅程新增、置顶、收藏变更时整体失效）
+    TRIP_LIST_CACHE_TTL: int = 30        # 缓存秒数，<= 0 时禁用
+    TRIP_LIST_CACHE_SIZE: int = 2000     # 进程内缓存最大条目数
+    TRIP_LIST_CACHE_URL: str = ""        # 共享后端：redis://...；fake:// 为进程内模拟；为空时使用进程内缓存
+    # 失效后的这段时间内不写入缓存（秒）：只读副本可能还没复制到刚提交的写入，此时读到的旧数据不能缓存。
+    # 只在配置了 DATABASE_REPLICA_URLS 时生效，应不小于副本的复制延迟
+    TRIP_LIST_CACHE_WRITE_GRACE: float = 2
+    # worker 进程数（gunicorn / 镜像同样读取 WEB_CONCURRENCY）。
+    # 进程内缓存只能让本进程失效，多于 1 个 worker 且未配置 TRIP_LIST_CACHE_URL 时禁用列表缓存
+    WEB_CONCURRENCY: int = 1
+
+    # 请求级 SQL 统计（语句数、数据库耗时、行数），写入访问日志
+    SQL_SERVER_TIMING: bool = True       # 是否通过 Server-Timing 响应头返回数据库耗时
+    SQL_REPEAT_THRESHOLD: int = 10       # 同一语句形状在一个请求内执行达到此次数时告警（疑似 N+1），<= 0 关闭
+
+    # Prometheus 指标（GET /metrics）
+    METRICS_ENABLED: bool = True
+    METRICS_MULTIPROC_DIR: str = ""          # 多 worker 部署时各进程共享的指标目录（启动前需清空），为空时只输出本进程指标
+    METRICS_FLUSH_INTERVAL: float = 5        # 多进程模式下各进程写入指标文件的间隔秒数
+    METRICS_LATENCY_BUCKETS: List[float] = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+
+    # 运维诊断
+    ADMIN_USERS: List[str] = []              # 管理员用户名，可访问 /debug 和 /system 接口
+    PROFILER_ENABLED: bool = False           # 是否开放 /debug/profile 采样分析接口（默认关闭，需显式开启）
+    PROFILER_MAX_SECONDS: int = 60           # 单次采样最长秒数
+    PROFILER_INTERVAL: float = 0.005         # 采样间隔秒数
+    LOOP_LAG_THRESHOLD: float = 0.1          # 事件循环阻塞超过此秒数时记录告警日志，<= 0 关闭监控
+    LOOP_LAG_INTERVAL: float = 0.5           # 事件循环心跳间隔秒数
+
+    # 限流（令牌桶，超出时返回 429 + Retry-After）："方法 路径" -> {"user": 按 Token 用户名, "ip": 按客户端 IP}
+    # 额度格式为 "次数/周期"（second / minute / hour / day），路径含 API 前缀，可包含 {参数}
+    # 默认关闭：按 IP 的额度需要先配置 RATE_LIMIT_TRUSTED_PROXIES，否则反向代理之后所有用户共用代理地址的令牌桶
+    RATE_LIMIT_ENABLED: bool = False
+    RATE_LIMIT_RULES: Dict[str, Dict[str, str]] = {
+        "POST /v1/user/login": {"ip": "10/minute"},
+        "POST /v1/user/register": {"ip": "10/minute"},
+        "GET /v1/trips/list": {"user": "20/second", "ip": "50/second"},
+    }
+    RATE_LIMIT_URL: str = ""                 # 共享存储：redis://...；fake:// 为进程内模拟；为空时各进程独立计数
+    RATE_LIMIT_MAX_KEYS: int = 100000        # 进程内实现最多保存的令牌桶数
+    RATE_LIMIT_TRUSTED_PROXIES: int = 0      # 前面的可信反向代理层数，> 0 时取 X-Forwarded-For 从右数第 N 个地址作为客户端 IP
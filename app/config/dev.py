@@ -6,6 +6,8 @@ class DevSettings(Settings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # one week
     ACCESS_TOKEN_TTL: int = 60
     DEBUG: bool = True
+    DB_ECHO: bool = True
+    DB_POOL_SIZE: int = 5
     ALLOWED_HOSTS: list = [
       "http://localhost",
       "http://localhost:3000",
@@ -10,4 +10,5 @@ class ProductionSettings(Settings):
       "http://localhost",
       "http://localhost:3000",
       "http://localhost:8000",
-    ]
\ No newline at end of file
+    ]
+    SQL_SERVER_TIMING: bool = False  # 生产环境不对外暴露数据库耗时
@@ -1,4 +1,6 @@
+from typing import Optional
 from fastapi import Depends, Request, HTTPException
+from app.config import settings
 from app.models import UserProfile
 
 def get_current_user(request: Request) -> UserProfile:
@@ -8,4 +10,18 @@ def get_current_user(request: Request) -> UserProfile:
     user = getattr(request.state, "user", None)
     if not user:
         raise HTTPException(status_code=401, detail="User not authenticated")
+    return user
+
+def get_optional_user(request: Request) -> Optional[UserProfile]:
+    """
+    获取当前用户，未登录时返回 None（用于匿名和登录用户都可访问的接口）。
+    """
+    return getattr(request.state, "user", None)
+
+def get_admin_user(user: UserProfile = Depends(get_current_user)) -> UserProfile:
+    """
+    获取当前管理员用户（用户名在 ADMIN_USERS 中），否则返回 403。
+    """
+    if user.username not in settings.ADMIN_USERS:
+        raise HTTPException(status_code=403, detail="Admin privileges required")
     return user
\ No newline at end of file
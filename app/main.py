@@ -1,8 +1,12 @@
 from fastapi import FastAPI
-from app.middlewares import AuthMiddleware
-from app.database import init_db
+from app.middlewares import AuthMiddleware, MetricsMiddleware, RateLimitMiddleware, RequestContextMiddleware
+from app.metrics import metrics_endpoint, start_metrics, stop_metrics
+from app.profiling import start_loop_monitor, stop_loop_monitor
+from app.database import init_db, close_db
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
+from app.services.auth.security import password_hasher
+from app.utils import logger
 from app.utils.errors import register_exception_handler
 from app.routers.v1.api import router as api_router
 
@@ -23,11 +27,28 @@ app.add_middleware(
 )
 
 app.add_middleware(AuthMiddleware)
+# 限流（在鉴权之前，被限流的请求不查库、不校验密码）
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+# 请求 id、访问日志（需在鉴权之前执行，鉴权失败的请求也要记录）
+app.add_middleware(RequestContextMiddleware)
+# 最外层：请求指标
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
 register_exception_handler(app)
 
 app.add_event_handler("startup", init_db)
-#app.add_event_handler("shutdown")
+app.add_event_handler("startup", start_metrics)
+app.add_event_handler("startup", start_loop_monitor)
+app.add_event_handler("shutdown", stop_loop_monitor)
+app.add_event_handler("shutdown", stop_metrics)
+app.add_event_handler("shutdown", close_db)
+app.add_event_handler("shutdown", password_hasher.shutdown)
+app.add_event_handler("shutdown", logger.stop)
 
 # 注册路由
-app.include_router(api_router, prefix=settings.API_V1_STR)
\ No newline at end of file
+app.include_router(api_router, prefix=settings.API_V1_STR)
+if settings.METRICS_ENABLED:
+    # Prometheus 抓取地址（不带 API 前缀，不需要鉴权，应只在内网开放）
+    app.add_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
\ No newline at end of file
@@ -0,0 +1,107 @@
+import asyncio
+from typing import Optional
+from starlette.requests import Request
+from starlette.responses import Response
+from app.config import settings
+from app.database import get_pool_stats
+from app.services.auth.cache import user_cache
+from app.services.auth.token import token_cache
+from app.utils.logging import logger
+from app.utils.metrics import CONTENT_TYPE, MetricsRegistry
+
+registry = MetricsRegistry(multiproc_dir=settings.METRICS_MULTIPROC_DIR)
+
+# 请求指标（由 MetricsMiddleware 记录，route 为路由模板，未匹配路由记为 unmatched，避免标签基数膨胀）
+http_requests = registry.counter(
+    "trip_api_http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+)
+http_latency = registry.histogram(
+    "trip_api_http_request_duration_seconds", "HTTP request latency in seconds", ("method", "route"),
+    buckets=settings.METRICS_LATENCY_BUCKETS,
+)
+http_in_flight = registry.gauge("trip_api_http_requests_in_flight", "HTTP requests currently being served")
+rate_limited = registry.counter(
+    "trip_api_rate_limited_total", "Requests rejected by rate limiting", ("rule", "scope")
+)
+
+# 事件循环延迟（由 LoopLagMonitor 每次心跳记录）
+event_loop_lag = registry.histogram(
+    "trip_api_event_loop_lag_seconds", "Event loop scheduling delay in seconds",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+# 数据库连接池
+db_pool_connections = registry.gauge(
+    "trip_api_db_pool_connections", "DB pool connections by state", ("engine", "state")
+)
+db_pool_checkouts = registry.counter("trip_api_db_pool_checkouts_total", "DB pool checkouts", ("engine",))
+db_pool_timeouts = registry.counter("trip_api_db_pool_timeouts_total", "DB pool checkout timeouts", ("engine",))
+
+# 缓存
+cache_entries = registry.gauge("trip_api_cache_entries", "Cached entries", ("cache",))
+cache_hits = registry.counter("trip_api_cache_hits_total", "Cache hits", ("cache",))
+cache_misses = registry.counter("trip_api_cache_misses_total", "Cache misses", ("cache",))
+
+
+def _collect_pool(engine_name: str, stats: dict):
+    if "checked_out" not in stats:
+        return
+    for state in ("checked_out", "idle", "overflow"):
+        db_pool_connections.set(stats[state], engine=engine_name, state=state)
+    db_pool_checkouts.set_total(stats["checkouts"], engine=engine_name)
+    db_pool_timeouts.set_total(stats["timeouts"], engine=engine_name)
+
+
+@registry.register_collector
+def collect_db_pool():
+    stats = get_pool_stats()
+    _collect_pool("primary", stats)
+    for replica in stats.get("replicas", []):
+        _collect_pool(f"replica:{replica['host']}", replica)
+
+
+@registry.register_collector
+def collect_caches():
+    # 旅程列表缓存在采集时才导入，避免 services.trip 与 routers 的循环导入
+    from app.services.trip.cache import trip_list_cache
+
+    for stats in (user_cache.stats(), token_cache.stats(), trip_list_cache.stats()):
+        name = stats["name"]
+        if "size" in stats:
+            cache_entries.set(stats["size"], cache=name)
+        cache_hits.set_total(stats["hits"], cache=name)
+        cache_misses.set_total(stats["misses"], cache=name)
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    """GET /metrics：Prometheus 文本格式"""
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
+
+
+_flush_task: Optional[asyncio.Task] = None
+
+
+async def _flush_loop():
+    while True:
+        await asyncio.sleep(settings.METRICS_FLUSH_INTERVAL)
+        try:
+            registry.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush metrics: {e}")
+
+
+async def start_metrics():
+    """多进程模式下定期把本进程指标写入共享目录，供其他 worker 响应 /metrics 时合并"""
+    global _flush_task
+    if registry.multiproc_dir and _flush_task is None:
+        _flush_task = asyncio.get_running_loop().create_task(_flush_loop())
+
+
+async def stop_metrics():
+    global _flush_task
+    if _flush_task is not None:
+        _flush_task.cancel()
+        _flush_task = None
+    if registry.multiproc_dir:
+        # 最后一次写入：保留计数，标记退出后不再计入 gauge
+        registry.flush(exited=True)
@@ -1,62 +1,278 @@
-from fastapi import Depends, Request, HTTPException
-from starlette.middleware.base import BaseHTTPMiddleware
+import math
+import time
+from typing import Optional, Tuple
+from uuid import uuid4
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from sqlalchemy import select
 from sqlalchemy.exc import MultipleResultsFound
-from jose import JWTError, jwt
-from datetime import datetime
-from app.database import AsyncSessionLocal
+from jose import JWTError, ExpiredSignatureError
+from app.database import AsyncSessionLocal, replica_engines, use_replica
 from app.models import UserProfile
 from app.config import settings
+from app import metrics
+from app.services.auth.cache import user_cache
+from app.services.auth.token import decode_access_token
 from app.utils import logger, CommonResponse
+from app.utils.query_stats import QueryStats, query_stats_var
+from app.utils.rate_limit import RateLimitRules, create_rate_limiter
+from app.utils.logging import request_id_var, request_user_var
 
-class AuthMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        auth_header = request.headers.get("X-Forwarded-User")
-        if not auth_header:
-            response = await call_next(request)
-            return response
-
-        # 检查是否为 Bearer Token 格式
-        if not auth_header.startswith("Bearer "):
-            return CommonResponse.failed(status_code=401, err_msg="Invalid token format")
-        
-        token = auth_header.split(" ")[1]
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-            # 检查 Token 是否过期
-            expire_time = payload.get("exp")
-            if expire_time:
-                if datetime.utcnow() > datetime.utcfromtimestamp(expire_time):
-                    return CommonResponse.failed(status_code=401, err_msg="Token expired")
+async def resolve_user(auth_header: str) -> Tuple[Optional[UserProfile], Optional[JSONResponse]]:
+    """
+    解析 X-Forwarded-User 请求头中的 Bearer Token 并获取对应用户。
+
+    :param auth_header: X-Forwarded-User 请求头的值
+    :return: (用户, None)；鉴权失败时返回 (None, 错误响应)
+    """
+    # 检查是否为 Bearer Token 格式
+    if not auth_header.startswith("Bearer "):
+        return None, CommonResponse.failed(status_code=401, err_msg="Invalid token format")
 
-            # 提取用户信息
-            username = payload.get("username")
-            if not username:
-                return CommonResponse.failed(status_code=401, err_msg="Invalid token payload")
+    token = auth_header.split(" ")[1]
+    try:
+        # 签名校验结果按 Token 缓存，过期的 Token 不会命中缓存
+        payload = decode_access_token(token)
 
-        except JWTError:
-            return CommonResponse.failed(status_code=401, err_msg="Invalid token")
+        # 提取用户信息
+        username = payload.get("username")
+        if not username:
+            return None, CommonResponse.failed(status_code=401, err_msg="Invalid token payload")
 
+    except ExpiredSignatureError:
+        return None, CommonResponse.failed(status_code=401, err_msg="Token expired")
+    except JWTError:
+        return None, CommonResponse.failed(status_code=401, err_msg="Invalid token")
 
+    # 优先从进程内缓存获取用户，未命中再查库
+    user = user_cache.get(username)
+    if user is None:
         async with AsyncSessionLocal() as db:
             try:
-                res = await db.execute(
-                    select(UserProfile)
-                    .where(UserProfile.username == username)
-                )
-                user = res.scalar_one_or_none()  # 结果处理在会话块内
+                query = select(UserProfile).where(UserProfile.username == username)
+                with use_replica(db):
+                    res = await db.execute(query)
+                    user = res.scalar_one_or_none()  # 结果处理在会话块内
+                if user is None and replica_engines:
+                    # 副本可能尚未同步刚注册的用户，回主库确认
+                    res = await db.execute(query)
+                    user = res.scalar_one_or_none()
             except MultipleResultsFound:
                 # 记录日志并提示数据库数据异常
                 logger.error(f"Multiple users found with username: {username}")
-                return CommonResponse.failed(status_code=500, err_msg="Data inconsistency error")
+                return None, CommonResponse.failed(status_code=500, err_msg="Data inconsistency error")
             finally:
                 await db.close()
 
         if not user:
-            raise CommonResponse.failed(status_code=401, err_msg="User not found")
-        # 将用户信息注入到请求上下文中
-        request.state.user = user
+            return None, CommonResponse.failed(status_code=401, err_msg="User not found")
+        user_cache.set(username, user)
+
+    return user, None
+
+
+class AuthMiddleware:
+    """
+    纯 ASGI 鉴权中间件。
+    不继承 BaseHTTPMiddleware，避免其为每个请求额外创建任务和内存流带来的开销，也不影响流式响应。
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        auth_header = Headers(scope=scope).get("X-Forwarded-User")
+        if not auth_header:
+            await self.app(scope, receive, send)
+            return
+
+        user, error_response = await resolve_user(auth_header)
+        if error_response is not None:
+            await error_response(scope, receive, send)
+            return
+
+        # 将用户信息注入到请求上下文中（即 request.state.user），并附加到本请求的日志
+        scope.setdefault("state", {})["user"] = user
+        request_user_var.set(user.username)
 
         # 继续处理请求
-        response = await call_next(request)
-        return response
\ No newline at end of file
+        await self.app(scope, receive, send)
+
+
+class RequestContextMiddleware:
+    """
+    请求上下文中间件：为每个请求分配 request id（优先沿用 X-Request-ID 请求头），
+    写入日志上下文并回传到响应头，请求结束时记录一条带耗时的访问日志。
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = Headers(scope=scope).get("X-Request-ID") or uuid4().hex
+        # 请求结束时恢复上下文变量：进程内调用应用（如 httpx.ASGITransport）时，
+        # 多个请求在同一个任务中执行，不恢复的话上一个请求的值会带到下一个请求
+        request_id_token = request_id_var.set(request_id)
+        user_token = request_user_var.set("-")
+        # 只有显式的 query_budget 才作为外层统计，其余情况每个请求独立统计
+        outer = query_stats_var.get()
+        query_stats = QueryStats(parent=outer if outer is not None and outer.budget else None)
+        query_stats_token = query_stats_var.set(query_stats)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers["X-Request-ID"] = request_id
+                # 只包含响应开始前执行的语句（流式响应之后的查询只计入日志）
+                if settings.SQL_SERVER_TIMING and query_stats.statements:
+                    headers.append("Server-Timing", query_stats.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            latency_ms = (time.perf_counter() - start) * 1000
+            sql_info = ""
+            if query_stats.statements:
+                sql_info = (
+                    f" sql={query_stats.statements}q/{query_stats.db_time * 1000:.1f}ms"
+                    f" rows={query_stats.rows} hold={query_stats.hold_time * 1000:.1f}ms"
+                )
+            logger.info(f"{scope['method']} {scope['path']} {status_code} {latency_ms:.1f}ms{sql_info}")
+
+            for shape, count in query_stats.repeated(settings.SQL_REPEAT_THRESHOLD):
+                logger.warning(f"Possible N+1 query: {count}x {shape[:300]}")
+
+            query_stats_var.reset(query_stats_token)
+            request_user_var.reset(user_token)
+            request_id_var.reset(request_id_token)
+
+
+class MetricsMiddleware:
+    """
+    请求指标中间件：按路由模板记录请求数（含状态码）、延迟直方图和处理中的请求数。
+    放在最外层，鉴权失败、限流等提前返回的请求也会被记录。
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        metrics.http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.http_in_flight.dec()
+            # 路由匹配后 scope 中带有 route（路由模板，如 /v1/trips/{trip_id}/pin）
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            metrics.http_requests.inc(method=method, route=route_path, status=status_code)
+            metrics.http_latency.observe(time.perf_counter() - start, method=method, route=route_path)
+
+
+def _token_username(auth_header: Optional[str]) -> Optional[str]:
+    """从 X-Forwarded-User 请求头的 Token 中取用户名，Token 无效时返回 None（交给鉴权中间件处理）"""
+    if not auth_header or not auth_header.startswith("Bearer "):
+        return None
+    try:
+        return decode_access_token(auth_header.split(" ")[1]).get("username")
+    except JWTError:
+        return None
+
+
+def _client_ip(scope: Scope, headers: Headers) -> str:
+    """
+    客户端 IP：部署在 RATE_LIMIT_TRUSTED_PROXIES 层反向代理之后时，取 X-Forwarded-For 从右数第 N 个地址
+    （每层代理在右侧追加它看到的对端地址，左侧的地址可由客户端伪造）；否则取连接的对端地址
+    """
+    hops = settings.RATE_LIMIT_TRUSTED_PROXIES
+    forwarded = headers.get("X-Forwarded-For") if hops > 0 else None
+    if forwarded:
+        addresses = [address.strip() for address in forwarded.split(",") if address.strip()]
+        if addresses:
+            return addresses[max(len(addresses) - hops, 0)]
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class RateLimitMiddleware:
+    """
+    纯 ASGI 限流中间件：按 RATE_LIMIT_RULES 为匹配的路由分别维护按用户名、按客户端 IP 的令牌桶，
+    任一令牌桶耗尽时返回 429 和 Retry-After。
+    放在鉴权之前，被拒绝的请求不会查库或执行 bcrypt；用户名直接从 Token 中解析（签名校验结果有缓存）。
+    限流存储不可用时记录日志并放行。
+    """
+
+    def __init__(self, app: ASGIApp, rules: Optional[dict] = None, limiter=None):
+        """
+        :param rules: 限流规则，默认使用 RATE_LIMIT_RULES
+        :param limiter: 限流后端，默认按 RATE_LIMIT_URL 创建
+        """
+        self.app = app
+        self.rules = RateLimitRules(settings.RATE_LIMIT_RULES if rules is None else rules)
+        self.limiter = limiter or create_rate_limiter(settings.RATE_LIMIT_URL, settings.RATE_LIMIT_MAX_KEYS)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        matched = self.rules.match(scope["method"], scope["path"])
+        if matched is None:
+            await self.app(scope, receive, send)
+            return
+
+        rule, limits = matched
+        headers = Headers(scope=scope)
+        buckets = []
+        if "user" in limits:
+            username = _token_username(headers.get("X-Forwarded-User"))
+            if username:
+                buckets.append(("user", f"{rule}|user:{username}", limits["user"]))
+        if "ip" in limits:
+            buckets.append(("ip", f"{rule}|ip:{_client_ip(scope, headers)}", limits["ip"]))
+
+        # 所有令牌桶都有令牌时才一起扣减，避免用户桶扣了令牌而 IP 桶拒绝时白白损失一个令牌
+        try:
+            waits = await self.limiter.acquire([(key, limit) for _, key, limit in buckets])
+        except Exception as e:
+            logger.error(f"Rate limiter unavailable, request allowed: {e}")
+            waits = []
+        rejected = [(bucket, wait) for bucket, wait in zip(buckets, waits) if wait > 0]
+        if rejected:
+            for (limit_scope, key, limit), wait in rejected:
+                metrics.rate_limited.inc(rule=rule, scope=limit_scope)
+                logger.warning(f"Rate limited {key} ({limit.spec}), retry after {wait:.2f}s")
+            response = CommonResponse.failed(status_code=429, err_msg="Too many requests")
+            response.headers["Retry-After"] = str(max(math.ceil(max(wait for _, wait in rejected)), 1))
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
\ No newline at end of file
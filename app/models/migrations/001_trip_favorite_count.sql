@@ -0,0 +1,13 @@
+-- 收藏人数冗余列（Trip.favorite_count），由收藏 / 取消收藏时同步维护
+-- 加列后按 user_favorites 回填已有旅程的收藏数；回填可重复执行。
+-- 回填期间的新收藏会同时更新计数，回填结束后以 user_favorites 为准；请在低峰期执行。
+
+ALTER TABLE trips ADD COLUMN favorite_count INT NOT NULL DEFAULT 0;
+
+UPDATE trips t
+LEFT JOIN (
+    SELECT trip_id, COUNT(*) AS total
+    FROM user_favorites
+    GROUP BY trip_id
+) f ON f.trip_id = t.id
+SET t.favorite_count = COALESCE(f.total, 0);
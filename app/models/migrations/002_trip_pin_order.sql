@@ -0,0 +1,4 @@
+-- 置顶顺序列（Trip.pin_order）：从 1 开始，未置顶或未指定顺序为 0
+-- 已有置顶旅程的 pin_order 为 0，按 pin_order 排序时排在同组最前，可通过 PUT /trips/pins 重新排序。
+
+ALTER TABLE trips ADD COLUMN pin_order INT NOT NULL DEFAULT 0;
@@ -0,0 +1,18 @@
+-- 旅程列表、收藏和成员查询使用的索引（与 models 中的 Index 定义一致）
+-- 需在 002_trip_pin_order.sql 之后执行（idx_trips_pinned_pin_order 依赖 pin_order 列）。
+-- 大表上建议在低峰期执行；MySQL 8 的 ADD INDEX 为在线 DDL，不阻塞读写。
+
+ALTER TABLE trips
+    ADD INDEX idx_trips_owner_start_date (owner_id, start_date, id),
+    ADD INDEX idx_trips_owner_created_at (owner_id, created_at, id),
+    ADD INDEX idx_trips_pinned_start_date (is_pinned, start_date, id),
+    ADD INDEX idx_trips_pinned_pin_order (is_pinned, pin_order, id),
+    ADD INDEX idx_trips_start_date (start_date, id),
+    ADD INDEX idx_trips_created_at (created_at, id);
+
+ALTER TABLE user_favorites
+    ADD INDEX idx_user_favorites_user_created_at (user_id, created_at),
+    ADD INDEX idx_user_favorites_trip (trip_id);
+
+ALTER TABLE trip_members
+    ADD INDEX idx_trip_members_user (user_id, trip_id);
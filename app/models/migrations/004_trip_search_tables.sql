@@ -0,0 +1,16 @@
+-- 城市 / 风格标签检索表（trip_cities、trip_tags）
+-- 新表由启动时的 create_all 创建；已有旅程需回填后才能按城市 / 标签检索到。
+-- 需要 MySQL 8.0（JSON_TABLE）。可重复执行：INSERT IGNORE 跳过已存在的行，
+-- 同一旅程中只有大小写 / 重音不同的城市或标签（按列的校对规则相等）只保留一行。
+
+INSERT IGNORE INTO trip_cities (city, trip_id)
+SELECT TRIM(jt.name), t.id
+FROM trips t,
+     JSON_TABLE(t.cities, '$[*]' COLUMNS (name VARCHAR(100) PATH '$.name')) jt
+WHERE jt.name IS NOT NULL AND TRIM(jt.name) <> '';
+
+INSERT IGNORE INTO trip_tags (tag, trip_id)
+SELECT TRIM(jt.tag), t.id
+FROM trips t,
+     JSON_TABLE(t.style_tags, '$[*]' COLUMNS (tag VARCHAR(50) PATH '$')) jt
+WHERE jt.tag IS NOT NULL AND TRIM(jt.tag) <> '';
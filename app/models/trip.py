@@ -1,7 +1,7 @@
 from sqlalchemy import Column, CHAR, VARCHAR, DATE, Integer, JSON, SmallInteger, DATETIME, Index, ForeignKey
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
-from app.database import Base
+from sqlalchemy.sql import func, text
+from app.database import Base, utcnow
 from uuid import uuid4
 
 
@@ -22,12 +22,52 @@ class Trip(Base):
     style_tags = Column(JSON, nullable=False)
     settings = Column(JSON, nullable=False)
     is_pinned = Column(SmallInteger, default=0)
+    # 置顶顺序（从 1 开始，未置顶或未指定顺序为 0）
+    pin_order = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    # 收藏人数（冗余计数，由收藏 / 取消收藏时同步维护）
+    favorite_count = Column(Integer, nullable=False, default=0, server_default=text("0"))
     
-    # 时间戳
-    created_at = Column(DATETIME, default=func.now())
+    # 时间戳（UTC，客户端默认值：INSERT 后属性即可用，无需 refresh）
+    created_at = Column(DATETIME, default=utcnow, server_default=func.now())
     # 关系映射
     favorited_by = relationship("UserFavorite", back_populates="trip")
 
+    # 索引与 TripService 的查询方式对应：按 owner_id / is_pinned 过滤，按排序列 + id 排序和游标翻页
+    __table_args__ = (
+        Index('idx_trips_owner_start_date', 'owner_id', 'start_date', 'id'),
+        Index('idx_trips_owner_created_at', 'owner_id', 'created_at', 'id'),
+        Index('idx_trips_pinned_start_date', 'is_pinned', 'start_date', 'id'),
+        Index('idx_trips_pinned_pin_order', 'is_pinned', 'pin_order', 'id'),
+        Index('idx_trips_start_date', 'start_date', 'id'),
+        Index('idx_trips_created_at', 'created_at', 'id'),
+    )
+
+
+class TripCity(Base):
+    """旅程途经城市（由 Trip.cities 展开，用于按城市检索旅程）"""
+    __tablename__ = 'trip_cities'
+
+    # 联合主键：按城市查旅程直接走主键
+    city = Column(VARCHAR(100), primary_key=True)
+    trip_id = Column(Integer, ForeignKey('trips.id', ondelete='CASCADE'), primary_key=True)
+
+    __table_args__ = (
+        Index('idx_trip_cities_trip', 'trip_id'),
+    )
+
+
+class TripTag(Base):
+    """旅程风格标签（由 Trip.style_tags 展开，用于按标签检索旅程）"""
+    __tablename__ = 'trip_tags'
+
+    # 联合主键：按标签查旅程直接走主键
+    tag = Column(VARCHAR(50), primary_key=True)
+    trip_id = Column(Integer, ForeignKey('trips.id', ondelete='CASCADE'), primary_key=True)
+
+    __table_args__ = (
+        Index('idx_trip_tags_trip', 'trip_id'),
+    )
+
 
 class TripMember(Base):
     __tablename__ = 'trip_members'
@@ -38,7 +78,12 @@ class TripMember(Base):
 
     # 其他字段
     role = Column(SmallInteger, default=1)  # 默认值为 1（成员）
-    joined_at = Column(DATETIME, default=func.now())
+    joined_at = Column(DATETIME, default=utcnow, server_default=func.now())
+
+    # 按用户查询参与的旅程（主键以 trip_id 开头，无法覆盖）
+    __table_args__ = (
+        Index('idx_trip_members_user', 'user_id', 'trip_id'),
+    )
 
 
 
@@ -50,9 +95,15 @@ class UserFavorite(Base):
     user_id = Column(CHAR(36), ForeignKey('users.id'), primary_key=True, nullable=False)
     trip_id = Column(Integer, ForeignKey('trips.id'), primary_key=True, nullable=False)
 
-    # 时间戳
-    created_at = Column(DATETIME, server_default=func.now())
+    # 时间戳（UTC）
+    created_at = Column(DATETIME, default=utcnow, server_default=func.now())
 
     # 关系映射
     user = relationship("UserProfile", back_populates="favorites")
-    trip = relationship("Trip", back_populates="favorited_by")
\ No newline at end of file
+    trip = relationship("Trip", back_populates="favorited_by")
+
+    # 主键 (user_id, trip_id) 覆盖按用户查收藏状态；以下索引用于按收藏时间列出和按旅程统计
+    __table_args__ = (
+        Index('idx_user_favorites_user_created_at', 'user_id', 'created_at'),
+        Index('idx_user_favorites_trip', 'trip_id'),
+    )
\ No newline at end of file
@@ -2,8 +2,7 @@ from uuid import uuid4
 from sqlalchemy import Column, Index, Integer, String, Boolean, DateTime, Enum, text, CHAR
 from sqlalchemy.dialects.mysql import ENUM as MySQLENUM
 from sqlalchemy.orm import relationship
-from app.database import Base
-from datetime import datetime
+from app.database import Base, utcnow
 
 class UserProfile(Base):
     __tablename__ = "users"
@@ -26,17 +25,22 @@ class UserProfile(Base):
     gender = Column(
         MySQLENUM('male', 'female', 'other', 'undisclosed', name='gender_enum'),
         nullable=True,
+        default='undisclosed',
         server_default='undisclosed'
     )  # 使用MySQL原生ENUM类型
     avatar_url = Column(String(512), nullable=True)           # 适配长URL
-    is_active = Column(Boolean, server_default=text("TRUE"))   # 默认值写服务端
+    is_active = Column(Boolean, default=True, server_default=text("TRUE"))   # 默认值写服务端
+    # 同时设置客户端默认值（时间戳为 UTC）：INSERT 时由 ORM 填入，写入后无需再 refresh 读取服务端默认值
     created_at = Column(
         DateTime,
+        default=utcnow,
         server_default=text('CURRENT_TIMESTAMP'),  # 使用MySQL的时间函数
         nullable=False
     )
     updated_at = Column(
         DateTime, 
+        default=utcnow,
+        onupdate=utcnow,
         server_default=text('CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP'),
         nullable=False
     )  # 自动更新时间戳
@@ -0,0 +1,34 @@
+import asyncio
+import threading
+from typing import Optional
+from app.config import settings
+from app.metrics import event_loop_lag
+from app.utils.profiler import LoopLagMonitor, SamplingProfiler
+
+profiler = SamplingProfiler()
+loop_monitor = LoopLagMonitor(
+    threshold=settings.LOOP_LAG_THRESHOLD,
+    interval=settings.LOOP_LAG_INTERVAL,
+    on_lag=event_loop_lag.observe,
+)
+
+
+async def profile_event_loop(seconds: float, all_threads: bool = False, include_idle: bool = False) -> Optional[str]:
+    """
+    对当前事件循环采样 seconds 秒，返回 collapsed 格式的调用栈；已有采样在执行时返回 None。
+    采样在线程中执行，期间事件循环照常处理请求。
+    """
+    loop_thread = threading.get_ident()
+    stacks = await asyncio.to_thread(
+        profiler.sample, loop_thread, seconds, settings.PROFILER_INTERVAL, all_threads, include_idle
+    )
+    return None if stacks is None else profiler.render(stacks)
+
+
+async def start_loop_monitor():
+    if settings.LOOP_LAG_THRESHOLD > 0:
+        loop_monitor.start()
+
+
+async def stop_loop_monitor():
+    loop_monitor.stop()
@@ -1,8 +1,10 @@
 from fastapi import APIRouter
 from .user import router as user_router
 from .trip import router as trip_router
+from .system import router as system_router
 
 router = APIRouter()
 
 router.include_router(user_router)
 router.include_router(trip_router)
+router.include_router(system_router)
\ No newline at end of file
@@ -0,0 +1 @@
+from .system import *
\ No newline at end of file
@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import PlainTextResponse
+
+from app.config import settings
+from app.database import get_pool_stats
+from app.dependencies import get_admin_user
+from app.profiling import profile_event_loop
+from app.services.auth.cache import user_cache
+from app.services.auth.token import token_cache
+from app.services.trip.cache import trip_list_cache
+from app.utils.errors.exceptions import ServerException
+from app.utils.response.response import CommonResponse
+
+router = APIRouter()
+
+@router.get("/system/pool")
+async def pool_stats(user = Depends(get_admin_user)):
+    """
+    数据库连接池状态（已借出/空闲/溢出连接数、等待耗时、只读副本地址），用于压测时调整池大小（仅管理员）。
+    """
+    return CommonResponse.success(data=get_pool_stats())
+
+@router.get("/system/cache")
+async def cache_stats(user = Depends(get_admin_user)):
+    """
+    进程内缓存命中统计（仅管理员）。
+    """
+    return CommonResponse.success(data=[user_cache.stats(), token_cache.stats(), trip_list_cache.stats()])
+
+
+@router.get("/debug/profile", include_in_schema=False)
+async def profile(
+    seconds: float = Query(10, gt=0),
+    all_threads: bool = Query(False),
+    include_idle: bool = Query(False),
+    user = Depends(get_admin_user),
+):
+    """
+    对当前 worker 的事件循环采样 seconds 秒，返回 collapsed 格式调用栈（仅管理员，需开启 PROFILER_ENABLED）。
+    结果可直接交给 flamegraph.pl 或 speedscope 生成火焰图。
+    :param seconds: 采样时长，不超过 PROFILER_MAX_SECONDS
+    :param all_threads: 是否同时采样其他线程（如 bcrypt 线程池）
+    :param include_idle: 是否计入事件循环空闲等待 IO 的样本
+    """
+    if not settings.PROFILER_ENABLED:
+        raise ServerException(status_code=404, detail="Not Found")
+    if seconds > settings.PROFILER_MAX_SECONDS:
+        raise ServerException(status_code=400, detail=f"seconds must be <= {settings.PROFILER_MAX_SECONDS}")
+    stacks = await profile_event_loop(seconds, all_threads=all_threads, include_idle=include_idle)
+    if stacks is None:
+        raise ServerException(status_code=409, detail="Another profile is in progress")
+    return PlainTextResponse(stacks)
\ No newline at end of file
@@ -1,25 +1,67 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, validator
 from typing import List, Optional
-from datetime import date
+from datetime import date, datetime
+
+# 与 trip_cities.city / trip_tags.tag 列长度一致，超长时返回 422 而不是写库失败
+MAX_CITY_LENGTH = 100
+MAX_TAG_LENGTH = 50
 
 class TripBase(BaseModel):
-    title: str = Field(..., description="旅程名称")
+    title: str = Field(..., description="旅程名称", max_length=100)
     start_date: date = Field(..., description="开始日期")
     duration: int = Field(..., description="持续天数", gt=0)
     cities: List[dict] = Field(..., description="城市数组（名称+顺序+到达时间）")
     style_tags: List[str] = Field(..., description="旅行风格标签数组")
     settings: dict = Field(..., description="交通优先级等配置")
 
+    # 写入索引表前会去掉首尾空白，长度按去空白后计算
+    @validator("cities", each_item=True)
+    def check_city_name(cls, city):
+        name = city.get("name")
+        if isinstance(name, str) and len(name.strip()) > MAX_CITY_LENGTH:
+            raise ValueError(f"city name must be at most {MAX_CITY_LENGTH} characters")
+        return city
+
+    @validator("style_tags", each_item=True)
+    def check_style_tag(cls, tag):
+        if len(tag.strip()) > MAX_TAG_LENGTH:
+            raise ValueError(f"style tag must be at most {MAX_TAG_LENGTH} characters")
+        return tag
+
 class TripCreate(TripBase):
     owner_id: Optional[str] = Field(None, description="创建者ID")
 
 class TripResponse(TripBase):
     id: int = Field(..., description="旅程ID")
+    owner_id: Optional[str] = Field(None, description="创建者ID")
     is_pinned: bool = Field(False, description="是否置顶")
-    created_at: date = Field(..., description="创建时间")
+    pin_order: int = Field(0, description="置顶顺序")
+    created_at: datetime = Field(..., description="创建时间")
+    favorite_count: int = Field(0, description="收藏人数")
+    is_favorited: bool = Field(False, description="当前用户是否已收藏")
 
     class Config:
         orm_mode = True
 
+class TripSummary(BaseModel):
+    """列表精简视图：通过 fields 参数只返回部分字段（id 始终返回）"""
+    id: int = Field(..., description="旅程ID")
+    owner_id: Optional[str] = Field(None, description="创建者ID")
+    title: Optional[str] = Field(None, description="旅程名称")
+    start_date: Optional[date] = Field(None, description="开始日期")
+    duration: Optional[int] = Field(None, description="持续天数")
+    cities: Optional[List[dict]] = Field(None, description="城市数组（名称+顺序+到达时间）")
+    style_tags: Optional[List[str]] = Field(None, description="旅行风格标签数组")
+    settings: Optional[dict] = Field(None, description="交通优先级等配置")
+    is_pinned: Optional[bool] = Field(None, description="是否置顶")
+    pin_order: Optional[int] = Field(None, description="置顶顺序")
+    created_at: Optional[datetime] = Field(None, description="创建时间")
+    favorite_count: Optional[int] = Field(None, description="收藏人数")
+    is_favorited: Optional[bool] = Field(None, description="当前用户是否已收藏")
+
 class FavoriteRequest(BaseModel):
-    trip_id: str = Field(..., description="旅程ID")
\ No newline at end of file
+    trip_id: str = Field(..., description="旅程ID")
+
+class TripPinUpdate(BaseModel):
+    pinned: List[int] = Field([], description="按顺序置顶的旅程ID")
+    unpinned: List[int] = Field([], description="取消置顶的旅程ID")
\ No newline at end of file
@@ -1,28 +1,108 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query
 from typing import Optional, List
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.utils.errors.exceptions import ServerException
-from app.utils.response.response import BaseResponse, CommonResponse
-from .schemas import TripCreate, TripResponse
-from app.services.trip import TripService
+from app.config import settings
+from app.utils.response.response import BaseResponse, CommonResponse, PageQuery
+from app.utils.response.serializer import dumps, get_serializer
+from .schemas import TripCreate, TripResponse, TripPinUpdate, TripSummary
+from app.services.trip import TripService, trip_list_cache
 from app.database import get_db
 from app.utils import get_logger
-from app.dependencies import get_current_user
+from app.dependencies import get_current_user, get_optional_user
 
 router = APIRouter()
 
-@router.get("/trips/list", response_model=List[TripResponse])
+@router.get("/trips/list", response_model=BaseResponse[List[TripResponse]])
 async def list_trips(
     filter_type: Optional[str] = None,
     filter_value: Optional[str] = None,
     sort_by: Optional[str] = None,
+    mode: Optional[str] = Query(None, description="分页模式：offset（页码分页）或 cursor（游标分页）"),
+    current: Optional[int] = Query(None, ge=1, description="页码，offset 模式有效，默认 1"),
+    page_size: Optional[int] = Query(None, ge=1, le=100, description="每页数量，默认 10"),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor，cursor 模式有效"),
+    fields: Optional[str] = Query(None, description="只返回的字段，逗号分隔（如 title,start_date），见 TripSummary"),
+    if_none_match: Optional[str] = Header(None),
+    user = Depends(get_optional_user),
     db: AsyncSession = Depends(get_db),
     logger= Depends(get_logger)
 ):
+    """
+    旅程列表。不带分页参数（mode / current / page_size / cursor）时与原接口一致，data 为全部旅程；
+    带分页参数时按 mode 分页：offset 返回 list + pagination，cursor 返回 data + next_cursor。
+    响应按规范化的查询参数缓存（TRIP_LIST_CACHE_TTL），带 ETag；
+    请求头 If-None-Match 与缓存一致时直接返回 304，不查询数据库。
+    """
     logger.info("request trip list")
     try:
-      return CommonResponse.success(data=await TripService.list_trips(db, filter_type, filter_value, sort_by))
+      paginated = any(param is not None for param in (mode, current, page_size, cursor))
+      if paginated:
+          mode = mode or ("cursor" if cursor else "offset")
+          current = current or 1
+          page_size = page_size or 10
+      else:
+          mode = "all"
+      field_list = TripService.parse_fields(fields)
+      annotate = not field_list or "is_favorited" in field_list
+      cache_key = cached = None
+      if trip_list_cache.enabled:
+          # 缓存后端（如 Redis）不可用时跳过缓存直接查询数据库，与 invalidate_trip_list 和限流的处理一致
+          try:
+              cache_key = await trip_list_cache.key(
+                  mode=mode,
+                  filter_type=filter_type or None,
+                  filter_value=filter_value if filter_type else None,
+                  sort_by=sort_by or None,
+                  current=current if mode == "offset" else None,
+                  cursor=cursor if mode == "cursor" else None,
+                  page_size=page_size if paginated else None,
+                  fields=sorted(field_list) if field_list else None,
+                  # is_favorited 因人而异，需要标注时按用户分别缓存
+                  user=(user.id if user else "-") if annotate else None,
+              )
+              cached = await trip_list_cache.get(cache_key)
+          except Exception as e:
+              logger.error(f"Trip list cache unavailable, reading from database: {e}")
+              cache_key = cached = None
+      if cached is not None:
+          return cached.to_response(if_none_match)
+
+      if mode == "all":
+          trips = await TripService.list_trips(db, filter_type, filter_value, sort_by, field_list)
+      elif mode == "cursor":
+          trips, next_cursor = await TripService.list_trips_by_cursor(
+              db, page_size, cursor, filter_type, filter_value, sort_by, field_list
+          )
+      elif mode == "offset":
+          page = PageQuery(current=current, page_size=page_size)
+          trips, total = await TripService.list_trips_page(
+              db, page, filter_type, filter_value, sort_by, field_list
+          )
+      else:
+          raise ServerException(status_code=400, detail=f"Unsupported pagination mode: {mode}")
+
+      if annotate:
+          await TripService.annotate_favorites(db, trips, user)
+      data = TripService.project(trips, field_list)
+
+      schema = TripSummary if field_list else TripResponse
+      if mode == "all":
+          response = CommonResponse.success(data=data, schema=schema)
+      elif mode == "cursor":
+          response = CommonResponse.success(data=data, schema=schema, next_cursor=next_cursor)
+      else:
+          response = CommonResponse.table_success(data, page.current, page.page_size, total, schema=schema)
+      if cache_key is None:
+          return response
+      try:
+          cached = await trip_list_cache.set(cache_key, response)
+      except Exception as e:
+          logger.error(f"Failed to cache trip list: {e}")
+          return response
+      return cached.to_response(if_none_match)
     except ServerException as e:
       raise e
     except Exception as e:
@@ -31,6 +111,48 @@ async def list_trips(
             detail=f"{e}"
         )
 
+@router.get("/trips/export")
+async def export_trips(
+    filter_type: Optional[str] = None,
+    filter_value: Optional[str] = None,
+    sort_by: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="只返回的字段，逗号分隔（如 title,start_date），见 TripSummary"),
+    format: str = Query("ndjson", description="导出格式：ndjson（每行一个 JSON 对象）或 json（JSON 数组）"),
+    logger= Depends(get_logger)
+):
+    """
+    流式导出旅程，过滤和排序参数与 /trips/list 相同。数据边查边写，不在内存中拼装完整结果。
+    """
+    logger.info(f"request trip export format={format}")
+    if format not in ("ndjson", "json"):
+        raise ServerException(status_code=400, detail=f"Unsupported export format: {format}")
+    field_list = TripService.parse_fields(fields)
+    serializer = get_serializer(TripSummary, tuple(field_list)) if field_list else get_serializer(TripResponse)
+    batch_size = settings.TRIP_EXPORT_BATCH_SIZE
+
+    async def ndjson_rows():
+        chunk = []
+        async for trip in TripService.stream_trips(filter_type, filter_value, sort_by, field_list):
+            chunk.append(dumps(serializer.one(trip)))
+            if len(chunk) >= batch_size:
+                yield b"\n".join(chunk) + b"\n"
+                chunk = []
+        if chunk:
+            yield b"\n".join(chunk) + b"\n"
+
+    async def json_array():
+        yield b"["
+        separator = b""
+        # JSON 编码结果中不会出现原始换行符，可直接把行分隔符换成逗号
+        async for rows in ndjson_rows():
+            yield separator + rows.rstrip(b"\n").replace(b"\n", b",")
+            separator = b","
+        yield b"]"
+
+    if format == "json":
+        return StreamingResponse(json_array(), media_type="application/json")
+    return StreamingResponse(ndjson_rows(), media_type="application/x-ndjson")
+
 @router.post("/trips/create", response_model=TripResponse)
 async def create_trip(trip_data: TripCreate, user = Depends(get_current_user), 
                       db: AsyncSession = Depends(get_db),
@@ -39,7 +161,37 @@ async def create_trip(trip_data: TripCreate, user = Depends(get_current_user),
     try:
       trip_data.owner_id = user.id
       logger.info(f"trip info {trip_data}")
-      return CommonResponse.success(data=await TripService.create_trip(db, trip_data))
+      return CommonResponse.success(data=await TripService.create_trip(db, trip_data), schema=TripResponse)
+    except ServerException as e:
+      raise e
+    except Exception as e:
+        raise ServerException(
+            status_code=500,
+            detail=f"{e}"
+        )
+
+@router.post("/trips/bulk")
+async def bulk_create_trips(
+    items: List[dict] = Body(..., description="旅程数据列表，每项格式同 /trips/create"),
+    batch_size: Optional[int] = Query(None, ge=1, description="每条 INSERT 写入的行数，默认取配置"),
+    user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    logger= Depends(get_logger)
+):
+    logger.info(f"{user.username} request bulk trip create, {len(items)} items")
+    if len(items) > settings.TRIP_BULK_MAX_ITEMS:
+        raise ServerException(
+            status_code=400,
+            detail=f"Too many items: {len(items)} > {settings.TRIP_BULK_MAX_ITEMS}"
+        )
+    try:
+      result = await TripService.bulk_create_trips(
+          db, items, user.id, min(batch_size or settings.TRIP_BULK_BATCH_SIZE, settings.TRIP_BULK_BATCH_SIZE)
+      )
+      return CommonResponse.success(
+          data=result,
+          msg=f"created {len(result['created'])}, failed {len(result['errors'])}"
+      )
     except ServerException as e:
       raise e
     except Exception as e:
@@ -49,9 +201,33 @@ async def create_trip(trip_data: TripCreate, user = Depends(get_current_user),
         )
 
 @router.put("/trips/{trip_id}/pin")
-async def pin_trip(trip_id: str, db: AsyncSession = Depends(get_db)):
+async def pin_trip(trip_id: str, db: AsyncSession = Depends(get_db), user = Depends(get_current_user)):
+    try:
+      return CommonResponse.success(data=True, msg=await TripService.pin_trip(db, trip_id, user))
+    except ServerException as e:
+      raise e
+    except Exception as e:
+        raise ServerException(
+            status_code=500,
+            detail=f"{e}"
+        )
+
+@router.put("/trips/{trip_id}/unpin")
+async def unpin_trip(trip_id: str, db: AsyncSession = Depends(get_db), user = Depends(get_current_user)):
     try:
-      return CommonResponse.success(data=True, msg=await TripService.pin_trip(db, trip_id))
+      return CommonResponse.success(data=True, msg=await TripService.unpin_trip(db, trip_id, user))
+    except ServerException as e:
+      raise e
+    except Exception as e:
+        raise ServerException(
+            status_code=500,
+            detail=f"{e}"
+        )
+
+@router.put("/trips/pins")
+async def update_pins(pin_data: TripPinUpdate, db: AsyncSession = Depends(get_db), user = Depends(get_current_user)):
+    try:
+      return CommonResponse.success(data=await TripService.update_pins(db, pin_data, user))
     except ServerException as e:
       raise e
     except Exception as e:
@@ -85,9 +261,18 @@ async def unfavorite_trip(trip_id: str, db: AsyncSession = Depends(get_db), User
         )
 
 @router.post("/trips/favorite", response_model=BaseResponse[List[TripResponse]])
-async def favorite_trip(db: AsyncSession = Depends(get_db), User = Depends(get_current_user)):
+async def favorite_trip(
+    fields: Optional[str] = Query(None, description="只返回的字段，逗号分隔（如 title,start_date），见 TripSummary"),
+    db: AsyncSession = Depends(get_db),
+    User = Depends(get_current_user)
+):
     try:
-      return CommonResponse.success(await TripService.my_favorite(db, User))
+      field_list = TripService.parse_fields(fields)
+      trips = await TripService.my_favorite(db, User, field_list)
+      return CommonResponse.success(
+          TripService.project(trips, field_list),
+          schema=TripSummary if field_list else TripResponse
+      )
     except ServerException as e:
       raise e
     except Exception as e:
@@ -1,2 +1,3 @@
 from .token import *
-from .security import *
\ No newline at end of file
+from .security import *
+from .cache import *
\ No newline at end of file
@@ -0,0 +1,12 @@
+from app.config import settings
+from app.utils.cache import LRUCache
+
+# 认证用户缓存：username -> UserProfile（已脱离会话的只读对象）
+user_cache = LRUCache("user", maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+
+
+def invalidate_user(username: str):
+    """
+    用户资料变更（注册、修改资料、禁用等）后调用，清除缓存中的旧数据。
+    """
+    user_cache.invalidate(username)
@@ -1,5 +1,10 @@
+import asyncio
 import bcrypt
+from concurrent.futures import ThreadPoolExecutor
 from passlib.context import CryptContext
+from starlette.status import HTTP_503_SERVICE_UNAVAILABLE
+from app.config import settings
+from app.utils.errors.exceptions import ServerException
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -9,3 +14,46 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+
+class PasswordHasher:
+    """
+    在有界线程池中执行 bcrypt 哈希 / 校验。
+    bcrypt 计算期间会释放 GIL，放到线程池后登录高峰不会卡住事件循环上的其他请求。
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        """
+        :param max_workers: 并发执行 bcrypt 的线程数
+        :param max_pending: 排队 + 执行中的最大任务数，超过后拒绝新任务
+        """
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self.max_pending = max_pending
+        self.pending = 0
+
+    async def _run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            raise ServerException(
+                status_code=HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server busy, please retry later",
+                headers={"Retry-After": "1"},
+            )
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+    async def verify(self, plain_password, hashed_password) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def hash(self, password) -> str:
+        return await self._run(get_password_hash, password)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
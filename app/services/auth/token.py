@@ -1,9 +1,15 @@
+import hashlib
+import time
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from typing import Optional
 from app.config import settings
+from app.utils.cache import LRUCache
 from datetime import datetime, timezone, timedelta
 
+# 已校验 Token 缓存：sha256(token) -> claims，条目在 Token 的 exp 时刻过期
+token_cache = LRUCache("token", maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -12,4 +18,23 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.now(timezone.utc) + timedelta(minutes=15)
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
\ No newline at end of file
+    return encoded_jwt
+
+def decode_access_token(token: str) -> dict:
+    """
+    校验并解析 Token。同一个 Token 在每个进程内只做一次签名校验，之后直接复用缓存的 claims。
+
+    :param token: JWT 字符串
+    :return: claims（只读，调用方不要修改）
+    :raises ExpiredSignatureError: Token 已过期
+    :raises JWTError: Token 无效
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    claims = token_cache.get(key)
+    if claims is not None:
+        return claims
+
+    claims = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    expire_time = claims.get("exp")
+    token_cache.set(key, claims, ttl=expire_time - time.time() if expire_time else None)
+    return claims
@@ -1 +1,2 @@
-from .trip_service import *
\ No newline at end of file
+from .trip_service import *
+from .cache import *
@@ -0,0 +1,39 @@
+from app.config import settings
+from app.utils.cache import ResponseCache, create_backend
+from app.utils.logging import logger
+
+
+def _cache_ttl() -> int:
+    """进程内缓存无法跨 worker 失效（其他 worker 会在整个 TTL 内返回旧列表），多 worker 时必须使用共享后端"""
+    if settings.TRIP_LIST_CACHE_TTL > 0 and settings.WEB_CONCURRENCY > 1 and not settings.TRIP_LIST_CACHE_URL:
+        logger.warning(
+            f"Trip list cache disabled: {settings.WEB_CONCURRENCY} workers require a shared TRIP_LIST_CACHE_URL"
+        )
+        return 0
+    return settings.TRIP_LIST_CACHE_TTL
+
+
+# /trips/list 响应缓存：规范化查询参数 -> 响应体（含 ETag）
+trip_list_cache = ResponseCache(
+    "trip_list",
+    create_backend(
+        "trip_list",
+        settings.TRIP_LIST_CACHE_URL,
+        maxsize=settings.TRIP_LIST_CACHE_SIZE,
+        ttl=settings.TRIP_LIST_CACHE_TTL,
+    ),
+    ttl=_cache_ttl(),
+    # 列表查询读取只读副本，副本追上写入之前不缓存
+    write_grace=settings.TRIP_LIST_CACHE_WRITE_GRACE if settings.DATABASE_REPLICA_URLS else 0,
+)
+
+
+async def invalidate_trip_list():
+    """
+    旅程新增、置顶变更、收藏变更提交后调用，使已缓存的列表响应失效。
+    写操作已提交，缓存后端不可用时只记录日志，不影响本次请求（旧条目最多保留 TTL 秒）。
+    """
+    try:
+        await trip_list_cache.invalidate()
+    except Exception as e:
+        logger.error(f"Failed to invalidate trip list cache: {e}")
@@ -1,19 +1,183 @@
-from sqlalchemy import select
+import unicodedata
+from datetime import date, datetime
+from sqlalchemy import select, insert, update, delete, case, func, or_, and_, text
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.exc import SQLAlchemyError
-from typing import Optional, List
-from app.models import Trip, UserFavorite, UserProfile
-from app.routers.v1.trip.schemas import TripCreate
+from sqlalchemy.orm import load_only
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from typing import Any, AsyncIterator, Optional, List, Tuple
+from app.config import settings
+from app.database import AsyncSessionLocal, replica_reads, use_replica
+from app.services.trip.cache import invalidate_trip_list
+from app.models import Trip, TripCity, TripTag, UserFavorite, UserProfile
+from pydantic import ValidationError
+from app.routers.v1.trip.schemas import TripCreate, TripPinUpdate, TripSummary
 from app.utils.errors.exceptions import ServerException
+from app.utils.response.response import Cursor, PageQuery
 from app.utils.logging import logger
 
+# MySQL 错误码
+ER_DUP_ENTRY = 1062             # 唯一键 / 主键冲突
+ER_NO_REFERENCED_ROW_2 = 1452   # 外键约束失败（引用的行不存在）
+
+
+def _integrity_error_code(e: IntegrityError) -> Optional[int]:
+    """
+    从驱动异常中取出约束错误类型，统一为 MySQL 错误码：
+    MySQL 驱动直接带错误码，SQLite 只能按错误信息区分
+    """
+    args = getattr(e.orig, "args", None)
+    if args and isinstance(args[0], int):
+        return args[0]
+    message = str(e.orig)
+    if "UNIQUE constraint failed" in message:
+        return ER_DUP_ENTRY
+    if "FOREIGN KEY constraint failed" in message:
+        return ER_NO_REFERENCED_ROW_2
+    return None
+
+
+def _search_key(value: str) -> str:
+    """
+    检索表主键的比较键：与 MySQL 默认校对规则（utf8mb4_0900_ai_ci）一样忽略大小写和重音，
+    使 "Kyoto" / "kyoto"、"Zürich" / "Zurich" 只写入一行
+    """
+    decomposed = unicodedata.normalize("NFKD", value.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def _unique_values(values) -> List[str]:
+    """去掉首尾空白后按 _search_key 去重，保留首次出现的写法"""
+    unique = {}
+    for value in values:
+        if isinstance(value, str) and value.strip():
+            unique.setdefault(_search_key(value.strip()), value.strip())
+    return list(unique.values())
+
+
+# 支持的排序方式：sort_by -> (排序列, 是否倒序)
+TRIP_SORTS = {
+    "id": (Trip.id, False),
+    "-id": (Trip.id, True),
+    "start_date": (Trip.start_date, False),
+    "-start_date": (Trip.start_date, True),
+    "created_at": (Trip.created_at, False),
+    "-created_at": (Trip.created_at, True),
+    "pin_order": (Trip.pin_order, False),
+    "-pin_order": (Trip.pin_order, True),
+}
+
+# fields 参数可选的字段（与 TripSummary 一致），以及其中对应数据库列的部分
+TRIP_FIELDS = set(TripSummary.__fields__)
+TRIP_COLUMNS = {column.key: getattr(Trip, column.key) for column in Trip.__table__.columns}
+
+# 游标中排序列取值的解析方式（未列出的为整数列）
+CURSOR_VALUE_PARSERS = {
+    "start_date": date.fromisoformat,
+    "created_at": datetime.fromisoformat,
+}
+
+# 游标分页未指定排序时的默认排序（主键不为空且唯一，游标只需记录 id）
+DEFAULT_CURSOR_SORT = "id"
+
+
 class TripService:
     @staticmethod
+    def _filter_clauses(filter_type: Optional[str], filter_value: Optional[str]) -> list:
+        """
+        根据过滤类型构建查询条件。
+
+        :param filter_type: 过滤类型（"owner_id"、"is_pinned"、"city" 或 "style_tag"）
+        :param filter_value: 过滤值
+        :return: where 条件列表
+        """
+        clauses = []
+        if filter_type and filter_value:
+            if filter_type == "owner_id":
+                clauses.append(Trip.owner_id == filter_value)
+            elif filter_type == "is_pinned":
+                is_pinned = filter_value.lower() == "true" if isinstance(filter_value, str) else False
+                clauses.append(Trip.is_pinned == is_pinned)
+            elif filter_type == "city":
+                clauses.append(Trip.id.in_(
+                    select(TripCity.trip_id).where(TripCity.city == filter_value.strip())
+                ))
+            elif filter_type == "style_tag":
+                clauses.append(Trip.id.in_(
+                    select(TripTag.trip_id).where(TripTag.tag == filter_value.strip())
+                ))
+        return clauses
+
+    @staticmethod
+    def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+        """
+        解析 fields 参数（逗号分隔的字段名），id 始终返回。
+
+        :param fields: 如 "title,start_date"，为空表示返回全部字段
+        :return: 字段列表，None 表示全部字段
+        """
+        if not fields:
+            return None
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in names if name not in TRIP_FIELDS]
+        if unknown:
+            raise ServerException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        return ["id"] + [name for name in dict.fromkeys(names) if name != "id"]
+
+    @staticmethod
+    def _load_only(fields: Optional[List[str]], *required_columns) -> list:
+        """
+        根据 fields 生成 load_only 选项，只从数据库读取需要的列（不读取 JSON 大字段）。
+
+        :param fields: parse_fields 的结果
+        :param required_columns: 查询本身需要的列（如游标分页的排序列）
+        :return: 查询 options 列表
+        """
+        if not fields:
+            return []
+        columns = [TRIP_COLUMNS[name] for name in fields if name in TRIP_COLUMNS]
+        columns.extend(column for column in required_columns if column not in columns)
+        return [load_only(*columns)]
+
+    @staticmethod
+    def project(trips: List[Trip], fields: Optional[List[str]]) -> list:
+        """
+        按 fields 把旅程转换为只含所需字段的字典（TripSummary），未指定 fields 时原样返回。
+        """
+        if not fields:
+            return trips
+        return [{name: getattr(trip, name, None) for name in fields} for trip in trips]
+
+    @staticmethod
+    def _list_query(
+        filter_type: Optional[str] = None,
+        filter_value: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ):
+        """
+        构建不分页的旅程列表查询（list_trips / stream_trips 共用）。
+        """
+        # 构建基础查询
+        query = (
+            select(Trip)
+            .where(*TripService._filter_clauses(filter_type, filter_value))
+            .options(*TripService._load_only(fields))
+        )
+
+        # 添加排序规则
+        if sort_by in TRIP_SORTS:
+            column, descending = TRIP_SORTS[sort_by]
+            query = query.order_by(column.desc() if descending else column.asc())
+        return query
+
+    @staticmethod
+    @replica_reads
     async def list_trips(
         db: AsyncSession,
         filter_type: Optional[str] = None,
         filter_value: Optional[str] = None,
-        sort_by: Optional[str] = None
+        sort_by: Optional[str] = None,
+        fields: Optional[List[str]] = None
     ) -> List[Trip]:
         """
         获取旅程列表，支持过滤和排序。
@@ -22,25 +186,11 @@ class TripService:
         :param filter_type: 过滤类型（如 "owner_id" 或 "is_pinned"）
         :param filter_value: 过滤值
         :param sort_by: 排序字段（如 "start_date" 或 "-start_date"）
+        :param fields: 只加载的字段（parse_fields 的结果），None 表示全部
         :return: 旅程列表
         """
         try:
-            # 构建基础查询
-            query = select(Trip)
-            # 添加过滤条件
-            if filter_type and filter_value:
-                if filter_type == "owner_id":
-                    query = query.where(Trip.owner_id == filter_value)
-                elif filter_type == "is_pinned":
-                    is_pinned = filter_value.lower() == "true" if isinstance(filter_value, str) else False
-                    query = query.where(Trip.is_pinned == is_pinned)
-
-            # 添加排序规则
-            if sort_by:
-                if sort_by == "start_date":
-                    query = query.order_by(Trip.start_date.asc())
-                elif sort_by == "-start_date":
-                    query = query.order_by(Trip.start_date.desc())
+            query = TripService._list_query(filter_type, filter_value, sort_by, fields)
 
             # 执行查询
             result = await db.execute(query)
@@ -62,6 +212,216 @@ class TripService:
             logger.error(f"Unexpected error while listing trips: {e}")
             raise ServerException(status_code=500, detail="Internal server error")
 
+    @staticmethod
+    async def stream_trips(
+        filter_type: Optional[str] = None,
+        filter_value: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> AsyncIterator[Trip]:
+        """
+        流式读取旅程（服务端游标，按批从 MySQL 拉取），内存占用与总行数无关。
+        流式响应在请求依赖退出后才开始发送，因此这里自行管理会话，不使用 get_db。
+        
+        :param filter_type: 过滤类型，同 list_trips
+        :param filter_value: 过滤值
+        :param sort_by: 排序字段
+        :param fields: 只加载的字段（parse_fields 的结果），None 表示全部
+        :return: 旅程异步迭代器
+        """
+        query = TripService._list_query(filter_type, filter_value, sort_by, fields)
+        query = query.execution_options(yield_per=settings.TRIP_EXPORT_BATCH_SIZE)
+
+        count = 0
+        async with AsyncSessionLocal() as db:
+            try:
+                with use_replica(db):
+                    result = await db.stream(query)
+                    async for trip in result.scalars():
+                        count += 1
+                        yield trip
+            except SQLAlchemyError as e:
+                logger.error(f"Database error while exporting trips after {count} rows: {e}")
+                raise
+
+        logger.info(f"Exported {count} trips with filters: {filter_type}={filter_value}, sort_by={sort_by}")
+
+    @staticmethod
+    @replica_reads
+    async def list_trips_page(
+        db: AsyncSession,
+        page: PageQuery,
+        filter_type: Optional[str] = None,
+        filter_value: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Tuple[List[Trip], int]:
+        """
+        按页码分页获取旅程列表（offset 分页）。
+        
+        :param db: 异步数据库会话
+        :param page: 分页参数
+        :param filter_type: 过滤类型（如 "owner_id" 或 "is_pinned"）
+        :param filter_value: 过滤值
+        :param sort_by: 排序字段（如 "start_date" 或 "-start_date"）
+        :param fields: 只加载的字段（parse_fields 的结果），None 表示全部
+        :return: (当前页旅程列表, 总数)
+        """
+        try:
+            clauses = TripService._filter_clauses(filter_type, filter_value)
+
+            total = (await db.execute(select(func.count(Trip.id)).where(*clauses))).scalar_one()
+
+            query = select(Trip).where(*clauses).options(*TripService._load_only(fields))
+            # 追加同方向的 id 作为次级排序，保证翻页结果稳定（与排序列 + id 的索引方向一致）
+            column, descending = TRIP_SORTS.get(sort_by, (Trip.id, False))
+            if column is not Trip.id:
+                query = query.order_by(column.desc() if descending else column.asc())
+            query = query.order_by(Trip.id.desc() if descending else Trip.id.asc())
+            query = query.offset((page.current - 1) * page.page_size).limit(page.page_size)
+
+            result = await db.execute(query)
+            trips = result.scalars().all()
+
+            logger.info(
+                f"Retrieved page {page.current} ({len(trips)}/{total} trips) with filters: "
+                f"{filter_type}={filter_value}, sort_by={sort_by}"
+            )
+            return trips, total
+
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while listing trips: {e}")
+            raise ServerException(status_code=500, detail="Database error")
+        except ServerException as e:
+            await db.rollback()
+            raise e
+        except Exception as e:
+            logger.error(f"Unexpected error while listing trips: {e}")
+            raise ServerException(status_code=500, detail="Internal server error")
+
+    @staticmethod
+    @replica_reads
+    async def list_trips_by_cursor(
+        db: AsyncSession,
+        limit: int,
+        cursor: Optional[str] = None,
+        filter_type: Optional[str] = None,
+        filter_value: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Tuple[List[Trip], Optional[str]]:
+        """
+        按游标分页获取旅程列表（keyset 分页），按 (排序列, id) 定位，深翻页与首页代价相同。
+        
+        :param db: 异步数据库会话
+        :param limit: 每页数量
+        :param cursor: 上一页返回的游标，为空时返回第一页
+        :param filter_type: 过滤类型（如 "owner_id" 或 "is_pinned"）
+        :param filter_value: 过滤值
+        :param sort_by: 排序字段（如 "start_date"、"-start_date"、"created_at"、"-created_at"），默认按 id
+        :param fields: 只加载的字段（parse_fields 的结果），None 表示全部
+        :return: (当前页旅程列表, 下一页游标；没有下一页时为 None)
+        """
+        sort_by = sort_by or DEFAULT_CURSOR_SORT
+        if sort_by not in TRIP_SORTS:
+            raise ServerException(status_code=400, detail=f"Unsupported sort_by for cursor pagination: {sort_by}")
+        column, descending = TRIP_SORTS[sort_by]
+
+        try:
+            query = (
+                select(Trip)
+                .where(*TripService._filter_clauses(filter_type, filter_value))
+                .options(*TripService._load_only(fields, column))
+            )
+
+            if cursor:
+                last_value, last_id = TripService._decode_trip_cursor(cursor, sort_by)
+                query = query.where(TripService._after_cursor(column, descending, last_value, last_id))
+
+            if column is not Trip.id:
+                query = query.order_by(column.desc() if descending else column.asc())
+            query = query.order_by(Trip.id.desc() if descending else Trip.id.asc())
+            # 多取一条用于判断是否还有下一页
+            query = query.limit(limit + 1)
+
+            result = await db.execute(query)
+            trips = result.scalars().all()
+
+            next_cursor = None
+            if len(trips) > limit:
+                trips = trips[:limit]
+                last = trips[-1]
+                last_value = getattr(last, column.key)
+                next_cursor = Cursor.encode({
+                    "sort": sort_by,
+                    # 可为空的排序列（created_at）取值为 None 时原样记录，由 _after_cursor 处理
+                    "value": last_value.isoformat() if hasattr(last_value, "isoformat") else last_value,
+                    "id": last.id,
+                })
+
+            logger.info(
+                f"Retrieved {len(trips)} trips by cursor with filters: "
+                f"{filter_type}={filter_value}, sort_by={sort_by}"
+            )
+            return trips, next_cursor
+
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while listing trips: {e}")
+            raise ServerException(status_code=500, detail="Database error")
+        except ServerException as e:
+            await db.rollback()
+            raise e
+        except Exception as e:
+            logger.error(f"Unexpected error while listing trips: {e}")
+            raise ServerException(status_code=500, detail="Internal server error")
+
+    @staticmethod
+    def _after_cursor(column, descending: bool, last_value: Any, last_id: int):
+        """
+        构建 (排序列, id) 位于游标之后的条件。
+        排序列可为空时与 MySQL / SQLite 的排序规则一致，把 NULL 视为最小值：
+        升序时 NULL 排在最前，降序时排在最后，游标落在 NULL 行上也能继续翻页。
+
+        :param column: 排序列
+        :param descending: 是否降序
+        :param last_value: 上一页最后一行的排序列取值
+        :param last_id: 上一页最后一行的 id
+        """
+        after_id = Trip.id < last_id if descending else Trip.id > last_id
+        if column is Trip.id:
+            return after_id
+        if last_value is None:
+            in_nulls = and_(column.is_(None), after_id)
+            return in_nulls if descending else or_(in_nulls, column.isnot(None))
+        if descending:
+            clause = or_(column < last_value, and_(column == last_value, after_id))
+        else:
+            clause = or_(column > last_value, and_(column == last_value, after_id))
+        if descending and Trip.__table__.c[column.key].nullable:
+            clause = or_(clause, column.is_(None))
+        return clause
+
+    @staticmethod
+    def _decode_trip_cursor(cursor: str, sort_by: str) -> Tuple[Any, int]:
+        """
+        解析旅程列表游标。
+
+        :param cursor: 游标字符串
+        :param sort_by: 当前请求的排序方式，必须与生成游标时一致
+        :return: (排序列取值, id)
+        """
+        try:
+            payload = Cursor.decode(cursor)
+            if payload.get("sort") != sort_by:
+                raise ValueError("cursor was issued for a different sort_by")
+            column, _ = TRIP_SORTS[sort_by]
+            parse = CURSOR_VALUE_PARSERS.get(column.key, int)
+            value = payload["value"]
+            return (None if value is None else parse(value)), int(payload["id"])
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Invalid trip cursor {cursor}: {e}")
+            raise ServerException(status_code=400, detail="Invalid cursor")
+
     @staticmethod
     async def create_trip(db: AsyncSession, trip_data: TripCreate):
         """
@@ -75,10 +435,14 @@ class TripService:
             # 验证输入数据
             new_trip = Trip(**trip_data.dict())
             
-            # 插入数据
+            # 插入数据（flush 获取自增 ID 后写入城市 / 标签检索表，同一事务提交）
             db.add(new_trip)
+            await db.flush()
+            await TripService._insert_search_rows(
+                db, [{"id": new_trip.id, "cities": new_trip.cities, "style_tags": new_trip.style_tags}]
+            )
             await db.commit()
-            await db.refresh(new_trip)
+            await invalidate_trip_list()
             
             logger.info(f"Created new trip with ID: {new_trip.id}")
             return new_trip
@@ -96,29 +460,138 @@ class TripService:
             raise ServerException(status_code=500, detail="Internal server error")
 
     @staticmethod
-    async def pin_trip(db: AsyncSession, trip_id: str):
+    async def bulk_create_trips(
+        db: AsyncSession,
+        items: List[dict],
+        owner_id: str,
+        batch_size: int
+    ) -> dict:
         """
-        置顶指定旅程。
+        批量创建旅程：逐条校验后，每 batch_size 条用一条多行 INSERT 写入，全部在同一事务中提交。
+        校验失败的条目不会写入，并按下标返回错误信息。
+        
+        :param db: 异步数据库会话
+        :param items: 旅程数据列表（TripCreate 格式）
+        :param owner_id: 创建者ID
+        :param batch_size: 每条 INSERT 写入的行数
+        :return: {"created": [{"index", "id"}], "errors": [{"index", "errors"}]}
+        """
+        valid, errors = [], []
+        for index, item in enumerate(items):
+            try:
+                trip_data = TripCreate.parse_obj(item)
+            except ValidationError as e:
+                errors.append({"index": index, "errors": e.errors()})
+                continue
+            trip_data.owner_id = owner_id
+            valid.append((index, trip_data.dict()))
+
+        created = []
+        if not valid:
+            return {"created": created, "errors": errors}
+
+        try:
+            for start in range(0, len(valid), batch_size):
+                batch = valid[start:start + batch_size]
+                ids = await TripService._insert_trip_rows(db, [row for _, row in batch])
+                rows = [dict(row, id=trip_id) for trip_id, (_, row) in zip(ids, batch)]
+                await TripService._insert_search_rows(db, rows)
+                created.extend({"index": index, "id": row["id"]} for (index, _), row in zip(batch, rows))
+            await db.commit()
+            await invalidate_trip_list()
+
+            logger.info(f"Bulk created {len(created)} trips for {owner_id}, {len(errors)} invalid items")
+            return {"created": created, "errors": errors}
+
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while bulk creating trips: {e}")
+            await db.rollback()
+            raise ServerException(status_code=500, detail="Database error")
+        except Exception as e:
+            logger.error(f"Unexpected error while bulk creating trips: {e}")
+            await db.rollback()
+            raise ServerException(status_code=500, detail="Internal server error")
+
+    @staticmethod
+    async def _insert_trip_rows(db: AsyncSession, rows: List[dict]) -> List[int]:
+        """
+        用一条多行 INSERT 写入旅程，按参数顺序返回各行的自增 ID。
+
+        支持 RETURNING 的数据库（SQLite / PostgreSQL 等）直接读回 ID；
+        MySQL 不支持 RETURNING，多行 VALUES 属于 InnoDB 的 simple insert（行数事先已知），
+        在不显式指定 ID 时自增值一次性分配，LAST_INSERT_ID 为第一行的 ID，
+        之后各行按 @@auto_increment_increment 递增。由于这依赖服务器配置，写入后按 ID 读回核对，
+        不一致时抛出异常回滚整个批量，避免把城市 / 标签挂到其他旅程上。
+
+        :param db: 异步数据库会话
+        :param rows: 旅程数据（不含 id）
+        :return: 与 rows 顺序一致的旅程 ID
+        """
+        if db.get_bind().dialect.insert_executemany_returning_sort_by_parameter_order:
+            result = await db.execute(insert(Trip).returning(Trip.id, sort_by_parameter_order=True), rows)
+            return list(result.scalars())
+
+        result = await db.execute(insert(Trip).values(rows))
+        step = (await db.execute(text("SELECT @@auto_increment_increment"))).scalar()
+        ids = [result.lastrowid + offset * step for offset in range(len(rows))]
+        inserted = (await db.execute(
+            select(Trip.id, Trip.owner_id, Trip.title).where(Trip.id.in_(ids))
+        )).all()
+        expected = {(trip_id, row["owner_id"], row["title"]) for trip_id, row in zip(ids, rows)}
+        if len(inserted) != len(rows) or set(map(tuple, inserted)) != expected:
+            raise RuntimeError(f"Inserted trip ids do not match LAST_INSERT_ID {result.lastrowid} step {step}")
+        return ids
+
+    @staticmethod
+    async def _insert_search_rows(db: AsyncSession, trips: List[dict]):
+        """
+        把旅程的城市和风格标签写入 trip_cities / trip_tags 检索表（需已获得旅程 ID）。
+
+        :param db: 异步数据库会话
+        :param trips: 已插入的旅程数据，包含 id、cities、style_tags
+        """
+        city_rows, tag_rows = [], []
+        for trip in trips:
+            cities = _unique_values(city.get("name") for city in trip["cities"] if isinstance(city, dict))
+            tags = _unique_values(trip["style_tags"])
+            city_rows.extend({"trip_id": trip["id"], "city": city} for city in cities)
+            tag_rows.extend({"trip_id": trip["id"], "tag": tag} for tag in tags)
+
+        # 列的校对规则可能与 _search_key 不完全一致（如自定义 collation），MySQL 上用 INSERT IGNORE 兜底，
+        # 重复的城市 / 标签只保留一行，不会因主键冲突导致整个创建失败
+        if city_rows:
+            await db.execute(insert(TripCity).prefix_with("IGNORE", dialect="mysql"), city_rows)
+        if tag_rows:
+            await db.execute(insert(TripTag).prefix_with("IGNORE", dialect="mysql"), tag_rows)
+
+    @staticmethod
+    async def pin_trip(db: AsyncSession, trip_id: str, current_user: UserProfile):
+        """
+        置顶指定旅程（直接 UPDATE，不加载整行旅程数据）。
+        只能操作当前用户创建的旅程，旅程不存在或无权限时都返回 404。
         
         :param db: 异步数据库会话
         :param trip_id: 旅程 ID
+        :param current_user: 当前用户
         :return: 成功消息
         """
         try:
-            # 查询旅程
-            query = select(Trip).where(Trip.id == trip_id)
-            result = await db.execute(query)
-            trip = result.scalar_one_or_none()
+            trip_id = TripService._parse_trip_id(trip_id)
+            result = await db.execute(
+                update(Trip)
+                .where(Trip.id == trip_id, Trip.owner_id == current_user.id)
+                .values(is_pinned=1)
+            )
 
-            if not trip:
-                logger.warning(f"Trip with ID {trip_id} not found")
+            # MySQL 方言开启了 CLIENT_FOUND_ROWS，rowcount 为匹配行数（已置顶的旅程也算 1）
+            if result.rowcount == 0:
+                logger.warning(f"Trip with ID {trip_id} not found for user {current_user.id}")
                 raise ServerException(status_code=404, detail="Trip not found")
 
-            # 更新置顶状态
-            trip.is_pinned = True
             await db.commit()
+            await invalidate_trip_list()
 
-            logger.info(f"Pinned trip with ID: {trip_id}")
+            logger.info(f"User {current_user.id} pinned trip with ID: {trip_id}")
             return {"message": "Trip pinned successfully"}
 
         except SQLAlchemyError as e:
@@ -134,9 +607,9 @@ class TripService:
             raise ServerException(status_code=500, detail="Internal server error")
 
     @staticmethod
-    async def favorite_trip(db: AsyncSession, trip_id: str, current_user: UserProfile):
+    async def unpin_trip(db: AsyncSession, trip_id: str, current_user: UserProfile):
         """
-        收藏指定旅程。
+        取消置顶指定旅程，权限同 pin_trip。
         
         :param db: 异步数据库会话
         :param trip_id: 旅程 ID
@@ -144,29 +617,132 @@ class TripService:
         :return: 成功消息
         """
         try:
-            # 查询旅程
-            query = select(Trip).where(Trip.id == trip_id)
-            result = await db.execute(query)
-            trip = result.scalar_one_or_none()
+            trip_id = TripService._parse_trip_id(trip_id)
+            result = await db.execute(
+                update(Trip)
+                .where(Trip.id == trip_id, Trip.owner_id == current_user.id)
+                .values(is_pinned=0, pin_order=0)
+            )
 
-            if not trip:
+            if result.rowcount == 0:
+                logger.warning(f"Trip with ID {trip_id} not found for user {current_user.id}")
                 raise ServerException(status_code=404, detail="Trip not found")
 
-            # 检查是否已收藏
-            query = select(UserFavorite).where(
-                UserFavorite.user_id == current_user.id,
-                UserFavorite.trip_id == trip_id
+            await db.commit()
+            await invalidate_trip_list()
+
+            logger.info(f"User {current_user.id} unpinned trip with ID: {trip_id}")
+            return {"message": "Trip unpinned successfully"}
+
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while unpinning trip: {e}")
+            await db.rollback()
+            raise ServerException(status_code=500, detail="Database error")
+        except ServerException as e:
+            await db.rollback()
+            raise e
+        except Exception as e:
+            logger.error(f"Unexpected error while unpinning trip: {e}")
+            await db.rollback()
+            raise ServerException(status_code=500, detail="Internal server error")
+
+    @staticmethod
+    async def update_pins(db: AsyncSession, pin_data: TripPinUpdate, current_user: UserProfile) -> dict:
+        """
+        批量置顶 / 取消置顶 / 调整置顶顺序，一条 UPDATE 完成。
+        只能操作当前用户创建的旅程，任一旅程不存在或无权限时整体回滚。
+        
+        :param db: 异步数据库会话
+        :param pin_data: pinned 为按顺序置顶的旅程 ID，unpinned 为取消置顶的旅程 ID
+        :param current_user: 当前用户
+        :return: 更新数量
+        """
+        pinned, unpinned = pin_data.pinned, pin_data.unpinned
+        trip_ids = pinned + unpinned
+        if not trip_ids:
+            return {"updated": 0}
+        if len(set(trip_ids)) != len(trip_ids):
+            raise ServerException(status_code=400, detail="Duplicate trip ids in pin request")
+
+        try:
+            if pinned:
+                # 置顶顺序从 1 开始，未置顶的旅程为 0
+                values = {
+                    "is_pinned": case({trip_id: 1 for trip_id in pinned}, value=Trip.id, else_=0),
+                    "pin_order": case(
+                        {trip_id: order for order, trip_id in enumerate(pinned, start=1)},
+                        value=Trip.id,
+                        else_=0,
+                    ),
+                }
+            else:
+                values = {"is_pinned": 0, "pin_order": 0}
+
+            result = await db.execute(
+                update(Trip)
+                .where(Trip.id.in_(trip_ids), Trip.owner_id == current_user.id)
+                .values(**values)
             )
-            result = await db.execute(query)
-            existing_favorite = result.scalar_one_or_none()
 
-            if existing_favorite:
-                raise ServerException(status_code=400, detail="Trip already favorited")
+            if result.rowcount != len(trip_ids):
+                logger.warning(
+                    f"User {current_user.id} pin update matched {result.rowcount}/{len(trip_ids)} trips"
+                )
+                raise ServerException(status_code=404, detail="Trip not found")
+
+            await db.commit()
+            await invalidate_trip_list()
+
+            logger.info(f"User {current_user.id} pinned {pinned}, unpinned {unpinned}")
+            return {"updated": result.rowcount}
+
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while updating trip pins: {e}")
+            await db.rollback()
+            raise ServerException(status_code=500, detail="Database error")
+        except ServerException as e:
+            await db.rollback()
+            raise e
+        except Exception as e:
+            logger.error(f"Unexpected error while updating trip pins: {e}")
+            await db.rollback()
+            raise ServerException(status_code=500, detail="Internal server error")
 
-            # 创建收藏记录
-            favorite = UserFavorite(user_id=current_user.id, trip_id=trip_id)
-            db.add(favorite)
+    @staticmethod
+    async def favorite_trip(db: AsyncSession, trip_id: str, current_user: UserProfile):
+        """
+        收藏指定旅程。
+        直接 INSERT 收藏记录，由主键冲突 / 外键约束判断“已收藏”和“旅程不存在”，
+        一条语句完成，并发重复点击时也不会产生脏数据。
+        未启用外键检查时（如 SQLite 默认配置）由更新收藏数的影响行数判断旅程是否存在。
+        
+        :param db: 异步数据库会话
+        :param trip_id: 旅程 ID
+        :param current_user: 当前用户
+        :return: 成功消息
+        """
+        try:
+            trip_id = TripService._parse_trip_id(trip_id)
+            try:
+                await db.execute(
+                    insert(UserFavorite).values(user_id=current_user.id, trip_id=trip_id)
+                )
+            except IntegrityError as e:
+                error_code = _integrity_error_code(e)
+                if error_code == ER_DUP_ENTRY:
+                    raise ServerException(status_code=409, detail="Trip already favorited")
+                if error_code == ER_NO_REFERENCED_ROW_2:
+                    raise ServerException(status_code=404, detail="Trip not found")
+                raise
+            result = await db.execute(
+                update(Trip)
+                .where(Trip.id == trip_id)
+                .values(favorite_count=Trip.favorite_count + 1)
+            )
+            if result.rowcount == 0:
+                raise ServerException(status_code=404, detail="Trip not found")
             await db.commit()
+            await invalidate_trip_list()
 
             logger.info(f"User {current_user.id} favorited trip {trip_id}")
             return "Trip favorited successfully"
@@ -187,6 +763,7 @@ class TripService:
     async def unfavorite_trip(db: AsyncSession, trip_id: str, current_user: UserProfile):
         """
         取消收藏指定旅程。
+        直接 DELETE 收藏记录并根据影响行数判断结果，只有删除失败时才额外查询旅程是否存在。
         
         :param db: 异步数据库会话
         :param trip_id: 旅程 ID
@@ -194,28 +771,27 @@ class TripService:
         :return: 成功消息
         """
         try:
-            # 查询旅程
-            query = select(Trip).where(Trip.id == trip_id)
-            result = await db.execute(query)
-            trip = result.scalar_one_or_none()
-
-            if not trip:
-                raise ServerException(status_code=404, detail="Trip not found")
-
-            # 检查是否已收藏
-            query = select(UserFavorite).where(
-                UserFavorite.user_id == current_user.id,
-                UserFavorite.trip_id == trip_id
+            trip_id = TripService._parse_trip_id(trip_id)
+            result = await db.execute(
+                delete(UserFavorite).where(
+                    UserFavorite.user_id == current_user.id,
+                    UserFavorite.trip_id == trip_id
+                )
             )
-            result = await db.execute(query)
-            favorite = result.scalar_one_or_none()
 
-            if not favorite:
+            if result.rowcount == 0:
+                trip_exists = await db.scalar(select(Trip.id).where(Trip.id == trip_id))
+                if not trip_exists:
+                    raise ServerException(status_code=404, detail="Trip not found")
                 raise ServerException(status_code=400, detail="Trip not favorited")
 
-            # 删除收藏记录
-            await db.delete(favorite)
+            await db.execute(
+                update(Trip)
+                .where(Trip.id == trip_id, Trip.favorite_count > 0)
+                .values(favorite_count=Trip.favorite_count - 1)
+            )
             await db.commit()
+            await invalidate_trip_list()
 
             logger.info(f"User {current_user.id} unfavorited trip {trip_id}")
             return "Trip unfavorited successfully"
@@ -231,15 +807,65 @@ class TripService:
             logger.error(f"Unexpected error while unfavoriting trip: {e}")
             await db.rollback()
             raise ServerException(status_code=500, detail="Internal server error")
+
+    @staticmethod
+    @replica_reads
+    async def annotate_favorites(
+        db: AsyncSession,
+        trips: List[Trip],
+        current_user: Optional[UserProfile]
+    ) -> List[Trip]:
+        """
+        为一页旅程标注当前用户是否已收藏（is_favorited），整页只查询一次 user_favorites。
+        收藏人数直接使用 Trip.favorite_count 冗余计数。
+        
+        :param db: 异步数据库会话
+        :param trips: 当前页旅程列表
+        :param current_user: 当前用户，未登录时为 None
+        :return: 原旅程列表
+        """
+        favorited_ids = set()
+        if trips and current_user is not None:
+            try:
+                result = await db.execute(
+                    select(UserFavorite.trip_id).where(
+                        UserFavorite.user_id == current_user.id,
+                        UserFavorite.trip_id.in_([trip.id for trip in trips])
+                    )
+                )
+                favorited_ids = set(result.scalars().all())
+            except SQLAlchemyError as e:
+                logger.error(f"Database error while loading favorite state: {e}")
+                raise ServerException(status_code=500, detail="Database error")
+
+        for trip in trips:
+            trip.is_favorited = trip.id in favorited_ids
+        return trips
+
+    @staticmethod
+    def _parse_trip_id(trip_id: str) -> int:
+        """
+        校验路径中的旅程 ID，非数字 ID 视为旅程不存在。
+        """
+        try:
+            return int(trip_id)
+        except (TypeError, ValueError):
+            raise ServerException(status_code=404, detail="Trip not found")
     
     @staticmethod   
-    async def my_favorite(db: AsyncSession, current_user: UserProfile) -> List[Trip]:
+    @replica_reads
+    async def my_favorite(
+        db: AsyncSession,
+        current_user: UserProfile,
+        fields: Optional[List[str]] = None
+    ) -> List[Trip]:
         """
         获取当前用户的收藏旅程列表。
         
         :param db: 数据库会话
         :param current_user: 当前用户对象
-        :return: 用户收藏的旅程列表
+        :param fields: 只加载的字段（parse_fields 的结果），None 表示全部
+        :return: 用户收藏的旅程列表（按收藏时间倒序）
         """
         try:
             # 使用 JOIN 查询直接获取用户收藏的旅程
@@ -247,6 +873,8 @@ class TripService:
                 select(Trip)
                 .join(UserFavorite, Trip.id == UserFavorite.trip_id)
                 .where(UserFavorite.user_id == current_user.id)
+                .order_by(UserFavorite.created_at.desc())
+                .options(*TripService._load_only(fields))
             )
             
             # 执行查询
@@ -258,6 +886,9 @@ class TripService:
                 logger.info(f"User {current_user.username} has no favorite trips.")
                 return []
 
+            for trip in my_favorite_trips:
+                trip.is_favorited = True
+
             logger.info(
                 f"Retrieved {len(my_favorite_trips)} favorite trips for user {current_user.username}."
             )
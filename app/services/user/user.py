@@ -5,7 +5,7 @@ from sqlalchemy import select
 from app.models import UserProfile
 from app.services.auth import security
 from app.config import settings
-from app.services.auth import create_access_token
+from app.services.auth import create_access_token, invalidate_user
 from app.routers.v1.user.schemas import UserCreate
 from app.utils.errors.exceptions import *
 from app.utils import logger
@@ -25,7 +25,7 @@ class User:
         if user_credentials:
             raise ServerException(status_code=HTTP_405_METHOD_NOT_ALLOWED, detail="User {} exists!".format(user.username))
         else:
-            hashed_password = security.get_password_hash(user.password)
+            hashed_password = await security.password_hasher.hash(user.password)
             # 创建新用户
             db_user = UserProfile(
                 username=user.username,
@@ -41,9 +41,10 @@ class User:
                 avatar_url=user.avatar_url,
                 is_active=True,
             )
+            # id、时间戳等默认值均在客户端生成，提交后无需 refresh
             db.add(db_user)
             await db.commit()
-            await db.refresh(db_user)
+            invalidate_user(db_user.username)
             return db_user
 
         
@@ -57,7 +58,7 @@ class User:
             raise ServerException(
                 status_code=HTTP_404_NOT_FOUND, detail="Unable to find this username"
             )
-        matched = security.verify_password(password, user.hashed_password)
+        matched = await security.password_hasher.verify(password, user.hashed_password)
         if (matched):
               # create jwt token with configured TTL in MVP1
               # TODO: dynamically refresh token after each api call
@@ -0,0 +1,285 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Hashable, Optional
+from starlette.responses import Response
+
+try:
+    import redis.asyncio as redis_asyncio  # 可选依赖：共享缓存后端
+except ImportError:
+    redis_asyncio = None
+
+
+class LRUCache:
+    """
+    进程内 TTL + LRU 缓存。
+    超过容量时淘汰最久未访问的条目，条目过期后在下次访问时清除。
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 60):
+        """
+        :param name: 缓存名称（用于统计 / 监控）
+        :param maxsize: 最大条目数，<= 0 时禁用缓存
+        :param ttl: 默认过期时间（秒）
+        """
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0      # 容量淘汰次数
+        self.expirations = 0    # 过期清除次数
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            expire_at, value = item
+            if expire_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """
+        写入缓存
+        :param ttl: 该条目的过期时间（秒），默认使用缓存的 ttl
+        """
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class CachedResponse:
+    """缓存的响应体及其 ETag"""
+
+    __slots__ = ("body", "etag", "media_type")
+
+    def __init__(self, body: bytes, etag: str, media_type: str = "application/json"):
+        self.body = body
+        self.etag = etag
+        self.media_type = media_type
+
+    def to_response(self, if_none_match: Optional[str] = None) -> Response:
+        """
+        生成响应：If-None-Match 与 ETag 一致时返回 304（无响应体）
+        :param if_none_match: 请求头 If-None-Match 的值
+        """
+        headers = {"ETag": self.etag}
+        if if_none_match and (
+            if_none_match.strip() == "*"
+            or self.etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+        ):
+            return Response(status_code=304, headers=headers)
+        return Response(content=self.body, media_type=self.media_type, headers=headers)
+
+
+class MemoryBackend:
+    """
+    进程内缓存后端（LRU + TTL），多进程部署时各进程独立缓存、独立失效：
+    一个 worker 上的写入不会使其他 worker 的缓存失效，多 worker 部署需使用共享后端
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.entries = LRUCache(name, maxsize=maxsize, ttl=ttl)
+        self._counters = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self.entries.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        self.entries.set(key, value, ttl)
+
+    async def get_counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+    async def incr(self, key: str) -> int:
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+    def stats(self) -> dict:
+        return self.entries.stats()
+
+
+class RedisBackend:
+    """
+    共享缓存后端，多个进程 / 实例共用同一份缓存和失效计数。
+    client 为 redis.asyncio.Redis 或接口兼容的对象（如 FakeRedis）。
+    """
+
+    def __init__(self, name: str, client):
+        self.name = name
+        self.client = client
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value = await self.client.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        await self.client.set(key, value, ex=max(int(ttl), 1))
+
+    async def get_counter(self, key: str) -> int:
+        value = await self.client.get(key)
+        return int(value) if value is not None else 0
+
+    async def incr(self, key: str) -> int:
+        return await self.client.incr(key)
+
+    def stats(self) -> dict:
+        return {"name": self.name, "backend": "redis", "hits": self.hits, "misses": self.misses}
+
+
+class FakeRedis:
+    """
+    进程内模拟的 Redis 客户端，只实现 RedisBackend 用到的 get / set / incr，
+    用于本地开发和测试共享后端的行为（无需启动 Redis）。
+    """
+
+    def __init__(self):
+        self._data = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expire_at, value = item
+        if expire_at is not None and expire_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: Any, ex: Optional[int] = None):
+        expire_at = time.monotonic() + ex if ex else None
+        self._data[key] = (expire_at, value if isinstance(value, bytes) else str(value).encode())
+
+    async def incr(self, key: str) -> int:
+        value = int(await self.get(key) or 0) + 1
+        self._data[key] = (None, str(value).encode())
+        return value
+
+
+def create_backend(name: str, url: str, maxsize: int, ttl: float):
+    """
+    按配置创建缓存后端
+    :param url: 为空时使用进程内缓存；redis://... 使用 Redis（需安装 redis）；fake:// 使用 FakeRedis
+    """
+    if not url:
+        return MemoryBackend(name, maxsize, ttl)
+    if url.startswith("fake://"):
+        return RedisBackend(name, FakeRedis())
+    if redis_asyncio is None:
+        raise RuntimeError(f"Cache backend {url} requires the redis package")
+    return RedisBackend(name, redis_asyncio.from_url(url))
+
+
+class ResponseCache:
+    """
+    按规范化的请求参数缓存完整响应体，并提供 ETag。
+    失效通过递增"代"计数实现：缓存键包含当前代数，失效后旧条目不再命中，随 TTL / LRU 自然清除。
+    write_grace > 0 时，失效后的 write_grace 秒内不写入缓存（标记与缓存条目存放在同一后端，多进程共享），
+    用于读取只读副本的场景：副本追上刚提交的写入之前读到的旧数据不会以新的代数缓存下来。
+    """
+
+    def __init__(self, name: str, backend, ttl: float, write_grace: float = 0):
+        """
+        :param ttl: 缓存秒数，<= 0 时禁用
+        :param write_grace: 失效后暂停写入缓存的秒数
+        """
+        self.name = name
+        self.backend = backend
+        self.ttl = ttl
+        self.write_grace = write_grace
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    async def key(self, **params) -> str:
+        """
+        生成缓存键（参数顺序无关，值为 None 的参数视为未传）
+        """
+        normalized = {k: v for k, v in params.items() if v is not None}
+        digest = hashlib.sha1(
+            json.dumps(normalized, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        generation = await self.backend.get_counter(f"{self.name}:generation")
+        return f"{self.name}:{generation}:{digest}"
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        if not self.enabled:
+            return None
+        body = await self.backend.get(key)
+        if body is None:
+            return None
+        return CachedResponse(body, self.etag(body))
+
+    async def set(self, key: str, response: Response) -> CachedResponse:
+        """
+        缓存成功响应（非 200 的响应只生成 ETag，不缓存）
+        """
+        body = bytes(response.body)
+        if response.status_code == 200 and self.enabled and not await self._in_write_grace():
+            await self.backend.set(key, body, self.ttl)
+        return CachedResponse(body, self.etag(body), response.media_type or "application/json")
+
+    async def invalidate(self):
+        """使所有已缓存的响应失效"""
+        await self.backend.incr(f"{self.name}:generation")
+        if self.write_grace > 0:
+            await self.backend.set(f"{self.name}:recent_write", b"1", self.write_grace)
+
+    async def _in_write_grace(self) -> bool:
+        return self.write_grace > 0 and await self.backend.get(f"{self.name}:recent_write") is not None
+
+    @staticmethod
+    def etag(body: bytes) -> str:
+        return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+    def stats(self) -> dict:
+        return self.backend.stats()
@@ -28,7 +28,11 @@ async def mysql_error_handler(request: Request, exc: MysqlException):
     )
 
 async def server_exception_handler(request: Request, e: ServerException) -> JSONResponse:
-    return CommonResponse.failed(status_code=e.status_code, err_msg=e.detail)
+    response = CommonResponse.failed(status_code=e.status_code, err_msg=e.detail)
+    # 保留异常携带的响应头（如 503 的 Retry-After）
+    if e.headers:
+        response.headers.update(e.headers)
+    return response
 
 async def http_error_handler(request: Request, exc: HTTPException) -> JSONResponse:
     try:
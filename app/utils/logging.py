@@ -1,8 +1,24 @@
-from pathlib import Path
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+import atexit
 import logging
-import time
-import os
 import traceback
+from app.config import settings
+
+# 请求级上下文（由 RequestContextMiddleware / AuthMiddleware 设置），自动附加到每条日志
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+request_user_var: ContextVar[str] = ContextVar("request_user", default="-")
+
+
+class RequestContextFilter(logging.Filter):
+    """把当前请求的 request id 和用户名写入日志记录"""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        record.user = request_user_var.get()
+        return True
+
 
 class Logger:
     LEVELS = {
@@ -13,44 +29,49 @@ class Logger:
         "CRITICAL": logging.CRITICAL
     }
 
-    def __init__(self, name="Logger", level="INFO", log_path=None):
+    def __init__(self, name="Logger", level="INFO", log_path="./server.log"):
         """
-        初始化本地日志记录器
+        初始化本地日志记录器。
+        业务代码只把日志记录放入内存队列，控制台和文件的写入由后台线程（QueueListener）完成，
+        不会在事件循环上做磁盘 IO。
         :param name: 记录器名称（显示在日志中）
         :param level: 日志级别 DEBUG/INFO/WARNING/ERROR/CRITICAL
-        :param log_path: 自定义日志文件路径（默认：~/server_<timestamp>.log）
+        :param log_path: 日志文件路径
         """
         self._level = level.upper()
         self.logger = logging.getLogger(name)
-        self.logger.setLevel(logging.DEBUG) 
-        
+        self.logger.setLevel(logging.DEBUG)
+
         # 清理旧处理器（防止重复）
         if self.logger.hasHandlers():
             self.logger.handlers.clear()
 
         # 设置日志格式
         formatter = logging.Formatter(
-            '%(asctime)s [%(name)s] %(levelname)-8s - %(message)s',
+            '%(asctime)s [%(name)s] %(levelname)-8s [%(request_id)s %(user)s] - %(message)s',
             datefmt='%Y-%m-%d %H:%M:%S'
         )
 
         # 控制台处理器
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(self.LEVELS[self._level])
-        console_handler.setFormatter(formatter)
-        self.logger.addHandler(console_handler)
+        self._console_handler = logging.StreamHandler()
+        self._console_handler.setLevel(self.LEVELS[self._level])
+        self._console_handler.setFormatter(formatter)
 
         # 文件处理器
-        if not log_path:
-            home = str(Path.home())
-            log_path = os.path.join(
-                home, 
-                f"server_{int(time.time())}.log"
-            )
         file_handler = logging.FileHandler(log_path)
-        file_handler.setLevel(logging.DEBUG) 
+        file_handler.setLevel(logging.DEBUG)
         file_handler.setFormatter(formatter)
-        self.logger.addHandler(file_handler)
+
+        # 队列处理器：调用方线程只做入队，请求上下文在入队时采集
+        queue = SimpleQueue()
+        queue_handler = QueueHandler(queue)
+        queue_handler.addFilter(RequestContextFilter())
+        self.logger.addHandler(queue_handler)
+
+        self._listener = QueueListener(queue, self._console_handler, file_handler, respect_handler_level=True)
+        self._listener.start()
+        self._started = True
+        atexit.register(self.stop)
 
     @property
     def level(self):
@@ -60,9 +81,13 @@ class Logger:
     def level(self, level):
         """动态修改控制台日志级别"""
         self._level = level.upper()
-        for handler in self.logger.handlers:
-            if isinstance(handler, logging.StreamHandler):
-                handler.setLevel(self.LEVELS[self._level])
+        self._console_handler.setLevel(self.LEVELS[self._level])
+
+    def stop(self):
+        """停止后台写日志线程（会先写完队列中剩余的日志）"""
+        if self._started:
+            self._started = False
+            self._listener.stop()
 
     def debug(self, message):
         self.logger.debug(message)
@@ -89,7 +114,9 @@ class Logger:
         self.logger.critical(message)
 
 
-def get_logger():
-    return Logger(name="trip-api", level="INFO")
+logger = Logger(name="trip-api", level=settings.LOG_LEVEL, log_path=settings.LOG_PATH)
+
 
-logger = Logger(name="trip-api", level="INFO", log_path="./server.log")
\ No newline at end of file
+def get_logger():
+    """FastAPI 依赖：返回进程内共享的 logger"""
+    return logger
@@ -0,0 +1,269 @@
+import glob
+import json
+import math
+import os
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence
+from uuid import uuid4
+
+# 请求延迟直方图默认分桶（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """指标基类：values 为 标签值元组 -> 数值（直方图为分桶计数列表）"""
+
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[tuple, object] = {}
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def clear(self):
+        self.values.clear()
+
+    def dump(self) -> dict:
+        return {
+            "type": self.type,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "values": [[list(key), value] for key, value in self.values.items()],
+        }
+
+    def render(self, values: Dict[tuple, object]) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    """只增计数器"""
+
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def set_total(self, value: float, **labels):
+        """直接设置累计值，用于采集其他组件自己维护的累计计数（如缓存命中数）"""
+        self.values[self._key(labels)] = value
+
+
+class Gauge(Metric):
+    """可增可减的瞬时值"""
+
+    type = "gauge"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        self.values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    """直方图：values 为 [各分桶计数..., +Inf 分桶计数, 总和]，输出时转换为累计分桶"""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        data = self.values.get(key)
+        if data is None:
+            data = self.values[key] = [0] * (len(self.buckets) + 2)
+        data[bisect_left(self.buckets, value)] += 1
+        data[-1] += value
+
+    def dump(self) -> dict:
+        dumped = super().dump()
+        dumped["buckets"] = list(self.buckets)
+        return dumped
+
+    def render(self, values: Dict[tuple, object]) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for key, data in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), data[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(data[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+def _process_start(pid: int) -> Optional[str]:
+    """进程启动时间（Linux 下 /proc/<pid>/stat 的 starttime 字段），无法读取时返回 None"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # 第 2 个字段为带括号的进程名（可能含空格），starttime 为其后的第 20 个字段
+    return stat.rpartition(")")[2].split()[19]
+
+
+class MetricsRegistry:
+    """
+    进程内指标注册表，输出 Prometheus 文本格式。
+
+    多进程部署（gunicorn 多 worker）时设置 multiproc_dir：各进程定期（flush）把自己的指标写入
+    <multiproc_dir>/metrics_<pid>_<随机串>.json，任一进程响应 /metrics 时合并所有进程的文件。
+    计数器和直方图累加（已退出进程的数据保留），gauge 只累加仍存活进程的值。
+    目录需在服务启动前清空。
+
+    - 文件名带每个进程独有的随机串，PID 被新进程复用时不会覆盖旧进程的文件；
+    - 进程存活以 PID + 进程启动时间（/proc/<pid>/stat，非 Linux 时只看 PID）判断，
+      正常退出时最后一次写入会标记 exited，之后其 gauge 不再计入；
+    - 两次写入之间的数据只在进程内存中：进程被强制结束（SIGKILL、OOM）时，
+      最多丢失最后一个写入间隔内的计数和直方图数据。
+    """
+
+    def __init__(self, multiproc_dir: Optional[str] = None):
+        self.multiproc_dir = multiproc_dir or None
+        if self.multiproc_dir:
+            os.makedirs(self.multiproc_dir, exist_ok=True)
+        self.metrics: Dict[str, Metric] = {}
+        self.collectors: List[Callable[[], None]] = []
+        # (pid, 随机串)：fork 出的子进程 PID 不同，首次写入时重新生成
+        self._identity = (None, "")
+
+    def _register(self, metric: Metric) -> Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"Duplicate metric {metric.name}")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], None]):
+        """注册采集函数（可作装饰器）：输出 / 写文件前调用，用于刷新连接池、缓存等指标"""
+        self.collectors.append(collector)
+        return collector
+
+    def collect(self):
+        for collector in self.collectors:
+            collector()
+
+    # ---------------------------------------------------------------- 多进程
+
+    def _path(self) -> str:
+        pid = os.getpid()
+        if self._identity[0] != pid:
+            self._identity = (pid, uuid4().hex[:12])
+        return os.path.join(self.multiproc_dir, f"metrics_{pid}_{self._identity[1]}.json")
+
+    def flush(self, exited: bool = False):
+        """
+        把本进程的指标写入多进程目录（先写临时文件再替换，读取方不会读到半个文件）
+        :param exited: 进程即将退出（最后一次写入），合并时不再计入其 gauge
+        """
+        if not self.multiproc_dir:
+            return
+        self.collect()
+        path = self._path()
+        pid = os.getpid()
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"pid": pid, "start": _process_start(pid), "time": time.time(), "exited": exited,
+                       "metrics": {name: m.dump() for name, m in self.metrics.items()}}, f)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _alive(snapshot: dict) -> bool:
+        if snapshot.get("exited"):
+            return False
+        pid = snapshot["pid"]
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        # PID 已被其他进程复用时启动时间不同
+        start = snapshot.get("start")
+        return start is None or _process_start(pid) == start
+
+    def _merged_values(self) -> Dict[str, Dict[tuple, object]]:
+        merged: Dict[str, Dict[tuple, object]] = {name: {} for name in self.metrics}
+        for path in glob.glob(os.path.join(self.multiproc_dir, "metrics_*.json")):
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            alive = self._alive(snapshot)
+            for name, dumped in snapshot["metrics"].items():
+                metric = self.metrics.get(name)
+                if metric is None or (dumped["type"] == "gauge" and not alive):
+                    continue
+                if isinstance(metric, Histogram) and dumped.get("buckets") != list(metric.buckets):
+                    continue
+                target = merged[name]
+                for key, value in dumped["values"]:
+                    key = tuple(key)
+                    if isinstance(value, list):
+                        current = target.get(key)
+                        target[key] = value if current is None else [a + b for a, b in zip(current, value)]
+                    else:
+                        target[key] = target.get(key, 0) + value
+        return merged
+
+    # ---------------------------------------------------------------- 输出
+
+    def render(self) -> str:
+        """Prometheus 文本格式（text/plain; version=0.0.4）"""
+        if self.multiproc_dir:
+            self.flush()
+            values = self._merged_values()
+        else:
+            self.collect()
+            values = {name: metric.values for name, metric in self.metrics.items()}
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.extend(metric.render(values[name]))
+        return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
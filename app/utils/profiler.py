@@ -0,0 +1,179 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from typing import Callable, Optional
+
+from app.utils.logging import logger
+
+# 事件循环空闲（等待 IO）时栈顶的函数，默认不计入采样结果
+_IDLE_FRAMES = {"select", "poll", "epoll", "kqueue", "_run_once"}
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _frame_label(code) -> str:
+    """栈帧名：函数名 (文件:首行)，按函数而不是按行聚合；项目内文件用相对路径"""
+    filename = code.co_filename
+    if filename.startswith(_ROOT):
+        filename = os.path.relpath(filename, _ROOT)
+    else:
+        filename = os.path.basename(filename)
+    # collapsed 格式用 ';' 分隔栈帧、用空格分隔计数
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+def collapse_frame(frame, prefix: str = "") -> str:
+    """把一个线程的栈转换为 collapsed 格式的一行（根在前，以 ';' 分隔）"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    if prefix:
+        labels.append(prefix)
+    return ";".join(reversed(labels))
+
+
+def _is_idle(frame) -> bool:
+    return frame is not None and frame.f_code.co_name in _IDLE_FRAMES and (
+        frame.f_back is None or frame.f_back.f_code.co_name in _IDLE_FRAMES
+    )
+
+
+class SamplingProfiler:
+    """
+    采样分析器：在后台线程中按固定间隔读取目标线程（事件循环线程）的调用栈并计数，
+    结果为 flamegraph.pl / speedscope 可直接读取的 collapsed 格式（每行 "a;b;c 次数"）。
+    只读取栈帧、不安装 trace 钩子，对被采样线程的开销仅为采样时持有 GIL 的时间。
+    同一时间只允许一次采样。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def sample(self, thread_id: int, seconds: float, interval: float,
+               all_threads: bool = False, include_idle: bool = False) -> Optional[Counter]:
+        """
+        阻塞执行 seconds 秒采样，需在目标线程以外的线程中调用。已有采样在执行时返回 None。
+        :param thread_id: 目标线程 ID（threading.get_ident()）
+        :param seconds: 采样时长
+        :param interval: 采样间隔秒数
+        :param all_threads: 是否同时采样其他线程（如 bcrypt 线程池），各线程以线程名为根
+        :param include_idle: 是否计入事件循环空闲等待 IO 的样本
+        """
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            stacks = Counter()
+            me = threading.get_ident()
+            # 线程名只在采样开始时和遇到新线程时读取，不在每次采样时遍历全部线程
+            names = {t.ident: t.name for t in threading.enumerate()} if all_threads else {}
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                for ident, frame in sys._current_frames().items():
+                    if ident == me or (ident != thread_id and not all_threads):
+                        continue
+                    if ident == thread_id and not include_idle and _is_idle(frame):
+                        continue
+                    prefix = ""
+                    if all_threads:
+                        prefix = names.get(ident)
+                        if prefix is None:
+                            names.update((t.ident, t.name) for t in threading.enumerate())
+                            prefix = names.setdefault(ident, str(ident))
+                    stacks[collapse_frame(frame, prefix)] += 1
+                time.sleep(interval)
+            return stacks
+        finally:
+            self._lock.release()
+
+    @staticmethod
+    def render(stacks: Counter) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+class LoopLagMonitor:
+    """
+    事件循环阻塞监控：
+      - 事件循环上的心跳任务每 interval 秒醒来一次，醒来时间比预期晚 threshold 以上时记录阻塞时长；
+      - 后台看门狗线程发现心跳超过 threshold 未更新时，立即记录事件循环线程当前的调用栈，
+        用于定位阻塞来源（如在事件循环上直接执行 bcrypt）。
+    """
+
+    def __init__(self, threshold: float, interval: float, on_lag: Optional[Callable[[float], None]] = None):
+        """
+        :param threshold: 阻塞告警阈值（秒）
+        :param interval: 心跳间隔（秒）
+        :param on_lag: 每次心跳回调实际延迟秒数（用于指标）
+        """
+        self.threshold = threshold
+        self.interval = interval
+        self.on_lag = on_lag
+        self.max_lag = 0.0
+        self.blocked = 0            # 超过阈值的次数
+        self._beat = 0.0
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    async def _heartbeat(self):
+        while True:
+            start = time.monotonic()
+            self._beat = start
+            await asyncio.sleep(self.interval)
+            lag = max(time.monotonic() - start - self.interval, 0.0)
+            self.max_lag = max(self.max_lag, lag)
+            if self.on_lag is not None:
+                self.on_lag(lag)
+            if lag >= self.threshold:
+                self.blocked += 1
+                logger.warning(f"Event loop was blocked for {lag * 1000:.0f}ms")
+
+    def _watch(self):
+        reported = None
+        while not self._stop.wait(self.interval):
+            beat = self._beat
+            if beat == reported or time.monotonic() - beat < self.interval + self.threshold:
+                continue
+            reported = beat
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            stack = "".join(traceback.format_stack(frame, limit=15))
+            logger.warning(
+                f"Event loop blocked for over {self.threshold * 1000:.0f}ms, current stack:\n{stack.rstrip()}"
+            )
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        self._task = None
+        self._stop.set()
+        # 看门狗在 stop 事件上等待，设置后立即退出；等它结束，避免 start 后出现两个看门狗
+        self._watchdog.join(timeout=1)
+        self._watchdog = None
+
+    def stats(self) -> dict:
+        return {
+            "threshold_ms": round(self.threshold * 1000, 1),
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "blocked": self.blocked,
+        }
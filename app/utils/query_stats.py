@@ -0,0 +1,152 @@
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+# 连续的占位符列表（IN (...)、多行 VALUES）折叠成一个，使参数个数不同的同一语句归为同一形状
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:%s|\?|:\w+)(?:\s*,\s*(?:%s|\?|:\w+))*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """SQL 语句的形状：去掉多余空白，折叠占位符列表（语句本身已是参数化的，不含参数值）"""
+    return _PLACEHOLDER_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+class QueryStats:
+    """
+    一次请求（或一段代码）执行的 SQL 统计：语句数、数据库耗时、行数、会话占用连接的时长，
+    以及各语句形状的执行次数。
+    由 RequestContextMiddleware 为每个请求创建，通过 query_stats_var 传给引擎和会话事件。
+    """
+
+    __slots__ = ("statements", "db_time", "rows", "hold_time", "shapes", "parent", "budget")
+
+    def __init__(self, parent: Optional["QueryStats"] = None, budget: bool = False):
+        """
+        :param parent: 外层统计（如 query_budget），记录时一并累加
+        :param budget: 是否为 query_budget 创建的统计（只有这种统计会作为请求统计的外层）
+        """
+        self.statements = 0
+        self.db_time = 0.0         # 秒，从发出语句到驱动返回
+        self.rows = 0              # 驱动报告的 rowcount 之和（SELECT 为返回行数，DML 为影响行数）
+        self.hold_time = 0.0       # 秒，会话占用连接的总时长（从开始事务到事务结束归还连接）
+        self.shapes = Counter()
+        self.parent = parent
+        self.budget = budget
+
+    def record(self, statement: str, elapsed: float, rowcount: int):
+        stats = self
+        shape = statement_shape(statement)
+        while stats is not None:
+            stats.statements += 1
+            stats.db_time += elapsed
+            stats.rows += max(rowcount, 0)
+            stats.shapes[shape] += 1
+            stats = stats.parent
+
+    def record_hold(self, elapsed: float):
+        stats = self
+        while stats is not None:
+            stats.hold_time += elapsed
+            stats = stats.parent
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """执行次数 >= threshold 的语句形状（疑似 N+1 查询）"""
+        if threshold <= 0:
+            return []
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+    def server_timing(self) -> str:
+        """Server-Timing 响应头的值"""
+        return f'db;dur={self.db_time * 1000:.1f};desc="{self.statements} queries"'
+
+    def as_dict(self) -> dict:
+        return {
+            "statements": self.statements,
+            "db_ms": round(self.db_time * 1000, 3),
+            "rows": self.rows,
+            "hold_ms": round(self.hold_time * 1000, 3),
+        }
+
+
+# 当前请求的 SQL 统计，未设置时引擎事件不做任何统计
+query_stats_var: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and query_stats_var.get() is not None:
+        context._query_stats_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = query_stats_var.get()
+    start = getattr(context, "_query_stats_start", None)
+    if stats is None or start is None:
+        return
+    stats.record(statement, time.perf_counter() - start, getattr(cursor, "rowcount", -1))
+
+
+# session.info 中当前占用的连接：[(QueryStats, 开始时间)]，每个事务、每个库各一项
+_HELD_CONNECTIONS = "query_stats_held"
+
+
+@event.listens_for(Session, "after_begin")
+def _after_begin(session, transaction, connection):
+    stats = query_stats_var.get()
+    if stats is not None:
+        session.info.setdefault(_HELD_CONNECTIONS, []).append((stats, time.perf_counter()))
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _after_transaction_end(session, transaction):
+    # 只在最外层事务结束（连接归还连接池）时统计
+    if transaction.parent is not None:
+        return
+    held = session.info.pop(_HELD_CONNECTIONS, None)
+    if held:
+        now = time.perf_counter()
+        for stats, since in held:
+            stats.record_hold(now - since)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def query_budget(max_statements: Optional[int] = None, max_repeats: Optional[int] = None):
+    """
+    限定一段代码的 SQL 语句数，超出时抛出 QueryBudgetExceeded，可在测试中断言各接口的查询预算：
+
+        with query_budget(max_statements=3, max_repeats=1):
+            response = await client.get("/v1/trips/list")
+
+    进程内调用应用时（如 httpx.ASGITransport），请求内的语句也会计入。
+    :param max_statements: 最多执行的语句数
+    :param max_repeats: 同一语句形状最多执行的次数（用于发现 N+1 查询）
+    """
+    stats = QueryStats(parent=query_stats_var.get(), budget=True)
+    token = query_stats_var.set(stats)
+    try:
+        yield stats
+    finally:
+        query_stats_var.reset(token)
+
+    problems = []
+    if max_statements is not None and stats.statements > max_statements:
+        problems.append(f"{stats.statements} statements (budget {max_statements})")
+    if max_repeats is not None:
+        problems.extend(
+            f"{count}x (budget {max_repeats}): {shape[:200]}"
+            for shape, count in stats.repeated(max_repeats + 1)
+        )
+    if problems:
+        raise QueryBudgetExceeded("Query budget exceeded: " + "; ".join(problems))
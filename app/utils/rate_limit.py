@@ -0,0 +1,243 @@
+import math
+import re
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Pattern, Sequence, Tuple
+
+from app.utils.cache import redis_asyncio
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+# 限流维度：按 Token 中的用户名 / 按客户端 IP
+SCOPES = ("user", "ip")
+
+
+class Limit:
+    """令牌桶参数：桶容量 burst，每秒补充 rate 个令牌"""
+
+    __slots__ = ("rate", "burst", "spec")
+
+    def __init__(self, rate: float, burst: float, spec: str = ""):
+        self.rate = rate
+        self.burst = burst
+        self.spec = spec
+
+    @classmethod
+    def parse(cls, spec: str) -> "Limit":
+        """
+        解析 "次数/周期"，周期为 second / minute / hour / day（如 "10/minute"），桶容量等于次数
+        :raises ValueError: 格式非法
+        """
+        count, _, period = spec.partition("/")
+        try:
+            count = int(count)
+            seconds = _PERIODS[period.strip().rstrip("s")]
+        except (ValueError, KeyError):
+            raise ValueError(f"Invalid rate limit: {spec}")
+        if count <= 0:
+            raise ValueError(f"Invalid rate limit: {spec}")
+        return cls(rate=count / seconds, burst=count, spec=spec)
+
+    @property
+    def refill_time(self) -> float:
+        """空桶补满所需秒数，超过这段时间未访问的桶与新桶等价，可以丢弃"""
+        return self.burst / self.rate
+
+
+def refill(tokens: float, last: float, now: float, limit: Limit) -> float:
+    """按经过的时间补充令牌，不超过桶容量"""
+    return min(limit.burst, tokens + max(now - last, 0) * limit.rate)
+
+
+def wait_time(tokens: float, limit: Limit) -> float:
+    """取一个令牌需等待的秒数，0 表示可以立即取到"""
+    return 0.0 if tokens >= 1 else (1 - tokens) / limit.rate
+
+
+class MemoryRateLimiter:
+    """
+    进程内令牌桶：每个 key 保存 [令牌数, 上次更新时间, 可丢弃时间]，每次请求 O(1) 更新。
+    桶按最近访问排序，已补满的桶从头部顺带清除，超过 max_keys 时淘汰最久未访问的桶。
+    多进程部署时各进程独立计数（实际额度为 进程数 x 配置值），需要全局额度时使用 RedisRateLimiter。
+    """
+
+    def __init__(self, max_keys: int = 100000, clock: Callable[[], float] = time.monotonic):
+        """
+        :param max_keys: 最多保存的令牌桶数
+        :param clock: 时钟（秒），测试时可替换
+        """
+        self.max_keys = max_keys
+        self.clock = clock
+        self.buckets: "OrderedDict[str, list]" = OrderedDict()
+
+    async def acquire(self, buckets: Sequence[Tuple[str, Limit]]) -> List[float]:
+        """
+        从多个令牌桶中各取一个令牌：全部有令牌时才一起扣减，任一桶不足时都不扣减
+        :param buckets: [(key, Limit)]
+        :return: 每个桶需等待的秒数，全为 0 表示放行
+        """
+        now = self.clock()
+        states = []
+        for key, limit in buckets:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = [limit.burst, now, now + limit.refill_time]
+                self._evict(now)
+            else:
+                self.buckets.move_to_end(key)
+            bucket[0] = refill(bucket[0], bucket[1], now, limit)
+            bucket[1] = now
+            bucket[2] = now + limit.refill_time
+            states.append((bucket, limit))
+        waits = [wait_time(bucket[0], limit) for bucket, limit in states]
+        if not any(waits):
+            for bucket, _ in states:
+                bucket[0] -= 1
+        return waits
+
+    def _evict(self, now: float):
+        while self.buckets:
+            key, bucket = next(iter(self.buckets.items()))
+            if bucket[2] > now and len(self.buckets) <= self.max_keys:
+                break
+            del self.buckets[key]
+
+
+# 令牌桶的 Redis 实现：每个 key 一个哈希，参数为每个 key 的 rate / burst。
+# 先补充并检查全部令牌桶，都有令牌时才一起扣减（与 MemoryRateLimiter 一致），返回每个桶需等待的毫秒数。
+# 时间取 Redis 服务器时间（不受各实例时钟偏差影响），需要 Redis 5+（脚本中调用 TIME）。
+TOKEN_BUCKET_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local tokens = {}
+local waits = {}
+local allowed = true
+for i = 1, #KEYS do
+  local rate = tonumber(ARGV[i * 2 - 1])
+  local burst = tonumber(ARGV[i * 2])
+  local state = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+  local value = tonumber(state[1]) or burst
+  local last = tonumber(state[2]) or now
+  value = math.min(burst, value + math.max(now - last, 0) * rate)
+  tokens[i] = value
+  if value >= 1 then
+    waits[i] = 0
+  else
+    waits[i] = math.ceil((1 - value) / rate * 1000)
+    allowed = false
+  end
+end
+for i = 1, #KEYS do
+  local rate = tonumber(ARGV[i * 2 - 1])
+  local burst = tonumber(ARGV[i * 2])
+  local value = tokens[i]
+  if allowed then
+    value = value - 1
+  end
+  redis.call('HSET', KEYS[i], 'tokens', tostring(value), 'ts', tostring(now))
+  redis.call('PEXPIRE', KEYS[i], math.ceil(burst / rate * 1000) + 1000)
+end
+return waits
+"""
+
+
+class FakeRateLimitRedis:
+    """
+    进程内模拟的 Redis 客户端，只支持执行 TOKEN_BUCKET_SCRIPT（用 Python 实现同样的逻辑），
+    用于本地开发和测试共享存储限流的行为（无需启动 Redis）。
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        """
+        :param clock: 模拟 Redis 服务器时间（秒），测试时可替换
+        """
+        self.clock = clock
+        self._data: Dict[str, Tuple[float, float, float]] = {}   # key -> (令牌数, 更新时间, 过期时间)
+
+    async def eval(self, script: str, numkeys: int, *keys_and_args):
+        if script != TOKEN_BUCKET_SCRIPT:
+            raise ValueError("FakeRateLimitRedis only supports TOKEN_BUCKET_SCRIPT")
+        keys, args = keys_and_args[:numkeys], keys_and_args[numkeys:]
+        # 同步执行，期间不会切换协程，与 Redis 中脚本的原子性一致
+        now = self.clock()
+        states = []
+        for index, key in enumerate(keys):
+            limit = Limit(rate=float(args[index * 2]), burst=float(args[index * 2 + 1]))
+            item = self._data.get(key)
+            tokens, last = (item[0], item[1]) if item is not None and item[2] > now else (limit.burst, now)
+            states.append((key, refill(tokens, last, now, limit), limit))
+        waits = [math.ceil(wait_time(tokens, limit) * 1000) for _, tokens, limit in states]
+        allowed = not any(waits)
+        for key, tokens, limit in states:
+            self._data[key] = (tokens - 1 if allowed else tokens, now, now + limit.refill_time + 1)
+        return waits
+
+
+class RedisRateLimiter:
+    """
+    共享存储令牌桶：多进程 / 多实例共用同一份额度，每次请求一次 EVAL 原子地检查和扣减全部令牌桶。
+    client 为 redis.asyncio.Redis 或接口兼容的对象（如 FakeRateLimitRedis）。
+    """
+
+    def __init__(self, client, prefix: str = "ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def acquire(self, buckets: Sequence[Tuple[str, Limit]]) -> List[float]:
+        """参数与返回值同 MemoryRateLimiter.acquire"""
+        keys = [self.prefix + key for key, _ in buckets]
+        args = [value for _, limit in buckets for value in (limit.rate, limit.burst)]
+        waits = await self.client.eval(TOKEN_BUCKET_SCRIPT, len(keys), *keys, *args)
+        return [int(wait_ms) / 1000 for wait_ms in waits]
+
+
+def create_rate_limiter(url: str, max_keys: int):
+    """
+    按配置创建限流后端
+    :param url: 为空时使用进程内令牌桶；redis://... 使用 Redis（需安装 redis）；fake:// 使用 FakeRateLimitRedis
+    """
+    if not url:
+        return MemoryRateLimiter(max_keys)
+    if url.startswith("fake://"):
+        return RedisRateLimiter(FakeRateLimitRedis())
+    if redis_asyncio is None:
+        raise RuntimeError(f"Rate limit backend {url} requires the redis package")
+    return RedisRateLimiter(redis_asyncio.from_url(url))
+
+
+class RateLimitRules:
+    """
+    限流规则：{"方法 路径": {"user": "次数/周期", "ip": "次数/周期"}}。
+    路径为完整路径（含 API 前缀），可包含 {参数}；省略方法时匹配所有方法。
+    不含参数的规则按字典 O(1) 查找，含参数的规则按顺序做正则匹配。
+    """
+
+    def __init__(self, rules: Dict[str, Dict[str, str]]):
+        self.static: Dict[Tuple[str, str], Tuple[str, Dict[str, Limit]]] = {}
+        self.patterns: List[Tuple[str, Pattern, str, Dict[str, Limit]]] = []
+        for name, specs in rules.items():
+            method, _, path = name.strip().rpartition(" ")
+            method = method.strip().upper() or "*"
+            unknown = set(specs) - set(SCOPES)
+            if unknown:
+                raise ValueError(f"Invalid rate limit scope for {name}: {', '.join(sorted(unknown))}")
+            limits = {scope: Limit.parse(spec) for scope, spec in specs.items()}
+            if "{" in path:
+                regex = "[^/]+".join(re.escape(part) for part in re.split(r"\{[^/}]+\}", path))
+                self.patterns.append((method, re.compile(f"^{regex}$"), name, limits))
+            else:
+                self.static[(method, path)] = (name, limits)
+
+    def __bool__(self) -> bool:
+        return bool(self.static or self.patterns)
+
+    def match(self, method: str, path: str) -> Optional[Tuple[str, Dict[str, Limit]]]:
+        """
+        :return: (规则名, {维度: Limit})，没有匹配的规则时返回 None
+        """
+        matched = self.static.get((method, path)) or self.static.get(("*", path))
+        if matched is not None:
+            return matched
+        for rule_method, pattern, name, limits in self.patterns:
+            if rule_method in (method, "*") and pattern.match(path):
+                return name, limits
+        return None
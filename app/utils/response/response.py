@@ -1,8 +1,11 @@
+import base64
+import json
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
-from typing import Any, List, Optional, Generic, TypeVar
+from typing import Any, List, Optional, Generic, Type, TypeVar
 from pydantic import BaseModel, ConfigDict
 from pydantic.generics import GenericModel
+from .serializer import FastJSONResponse, get_serializer
 
 # 泛型支持
 T = TypeVar("T")
@@ -27,9 +30,32 @@ class Pagination(BaseModel):
             current_page=current_page,
             page_size=page_size,
             total=total,
-            total_pages=(total + page_size - 1)
+            total_pages=(total + page_size - 1) // page_size
         )
 
+class Cursor:
+    """不透明游标（keyset 分页），客户端只需原样回传上一页返回的 next_cursor"""
+
+    @staticmethod
+    def encode(payload: dict) -> str:
+        raw = json.dumps(payload, separators=(",", ":"), default=str).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @staticmethod
+    def decode(token: str) -> dict:
+        """
+        解析游标
+        :raises ValueError: 游标格式非法
+        """
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            payload = json.loads(raw)
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Invalid cursor: {token}") from e
+        if not isinstance(payload, dict):
+            raise ValueError(f"Invalid cursor: {token}")
+        return payload
+
 class BaseResponse(GenericModel, Generic[T]):
     code: int
     msg: str = ""
@@ -42,12 +68,25 @@ class CommonResponse:
     def success(
         data: Any = None,
         msg: str = "success",
+        schema: Optional[Type[BaseModel]] = None,
         **kwargs
     ) -> JSONResponse:
         """
         通用成功响应
         示例: /api/users/1
+        :param schema: 响应模型（如 TripResponse）。指定后按模型字段直接序列化 ORM 对象，
+                       跳过 jsonable_encoder（kwargs 需为可直接编码的基础类型）
         """
+        if schema is not None:
+            serializer = get_serializer(schema)
+            content = {
+                "code": 0,
+                "msg": msg,
+                "data": serializer.many(data) if isinstance(data, (list, tuple)) else serializer.one(data)
+            }
+            content.update(kwargs)
+            return FastJSONResponse(status_code=200, content=content)
+
         content = {
             "code": 0,
             "msg": msg,
@@ -157,19 +196,23 @@ class CommonResponse:
         page_size: int,
         total: int,
         msg: str = "success",
+        schema: Optional[Type[BaseModel]] = None,
         **kwargs
     ) -> JSONResponse:
         """
         表格数据成功响应
         示例: /api/users?page=1
+        :param schema: 响应模型，指定后跳过 jsonable_encoder，见 success
         """
         content = {
             "code": 0,
             "msg": msg,
-            "list": jsonable_encoder(data),
-            "pagination": Pagination.create(current, page_size, total)
+            "list": get_serializer(schema).many(data) if schema is not None else jsonable_encoder(data),
+            "pagination": Pagination.create(current, page_size, total).dict()
         }
         content.update(kwargs)
+        if schema is not None:
+            return FastJSONResponse(status_code=200, content=content)
         return JSONResponse(
             status_code=200,
             content=content,
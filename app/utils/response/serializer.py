@@ -0,0 +1,106 @@
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Callable, Iterable, List, Optional, Tuple, Type
+from uuid import UUID
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from pydantic.fields import SHAPE_SINGLETON, ModelField
+
+try:
+    import orjson  # 可选依赖：安装后使用更快的 JSON 编码
+except ImportError:
+    orjson = None
+
+
+def _default(obj: Any):
+    """标准库 json 无法直接编码的类型（orjson 原生支持日期和 UUID）"""
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, (Decimal, UUID)):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """编码为 JSON 字节串，有 orjson 时使用 orjson"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+        default=_default,
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """使用 dumps 编码的 JSONResponse，content 需已是可直接编码的基础类型"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _converter(field: ModelField) -> Optional[Callable[[Any], Any]]:
+    """按字段声明的数值类型转换值（如 SmallInteger 的 0/1 -> bool），其余类型原样输出"""
+    if field.shape != SHAPE_SINGLETON:
+        return None
+    for base in (bool, int, float):
+        if isinstance(field.type_, type) and issubclass(field.type_, base):
+            return base
+    return None
+
+
+class ModelSerializer:
+    """
+    按 pydantic 响应模型预先确定字段的行序列化器。
+    直接读取 ORM 对象已加载的属性（或字典的键），不经过 jsonable_encoder 的逐属性类型推断，
+    只对 bool / int / float 字段按声明类型转换，日期时间原样输出（与 jsonable_encoder 一致）。
+    字典视为已按字段投影的行（如 TripService.project 的结果），只输出其中存在的键；
+    ORM 对象未加载的属性改用 getattr 读取（ORM 列会触发懒加载，异步会话下报错，调用方需加载所需的列），
+    对象上不存在的字段输出模型默认值，必填字段缺失时抛出 ValueError。
+    """
+
+    def __init__(self, model: Type[BaseModel], fields: Optional[Tuple[str, ...]] = None):
+        """
+        :param model: 响应模型
+        :param fields: 只输出的字段（需为模型字段的子集），默认输出模型全部字段
+        """
+        self.model = model
+        self.fields = tuple(fields) if fields else tuple(model.__fields__)
+        self._plan = [(name, _converter(model.__fields__[name]), model.__fields__[name]) for name in self.fields]
+
+    def _missing(self, obj: Any, field: ModelField):
+        try:
+            return getattr(obj, field.name)
+        except AttributeError:
+            pass
+        if field.required:
+            raise ValueError(f"{self.model.__name__}.{field.name} is missing on {type(obj).__name__}")
+        return field.get_default()
+
+    def one(self, obj: Any) -> dict:
+        row = {}
+        if isinstance(obj, dict):
+            for name, convert, _ in self._plan:
+                if name in obj:
+                    value = obj[name]
+                    row[name] = value if convert is None or value is None else convert(value)
+            return row
+        values = obj.__dict__
+        for name, convert, field in self._plan:
+            value = values[name] if name in values else self._missing(obj, field)
+            row[name] = value if convert is None or value is None else convert(value)
+        return row
+
+    def many(self, objs: Iterable[Any]) -> List[dict]:
+        return [self.one(obj) for obj in objs]
+
+
+@lru_cache(maxsize=256)
+def get_serializer(model: Type[BaseModel], fields: Optional[Tuple[str, ...]] = None) -> ModelSerializer:
+    """获取（并缓存）响应模型对应的序列化器"""
+    return ModelSerializer(model, fields)
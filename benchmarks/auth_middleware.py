@@ -0,0 +1,96 @@
+"""
+鉴权中间件微基准：对比纯 ASGI 的 AuthMiddleware 与基于 BaseHTTPMiddleware 的旧实现在
+GET /v1/users/me 上的吞吐量（requests/sec）。
+
+用户预先放入进程内缓存，不依赖数据库，测得的是中间件本身的开销。
+
+运行（在项目根目录）：
+    python -m benchmarks.auth_middleware --requests 5000 --concurrency 50
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.config import settings
+from app.middlewares import AuthMiddleware, resolve_user
+from app.models import UserProfile
+from app.routers.v1.user import router as user_router
+from app.services.auth import create_access_token, user_cache
+
+USERNAME = "bench@example.com"
+
+
+class LegacyAuthMiddleware(BaseHTTPMiddleware):
+    """旧实现：与 AuthMiddleware 语义相同，但包在 BaseHTTPMiddleware 中"""
+
+    async def dispatch(self, request: Request, call_next):
+        auth_header = request.headers.get("X-Forwarded-User")
+        if not auth_header:
+            return await call_next(request)
+        user, error_response = await resolve_user(auth_header)
+        if error_response is not None:
+            return error_response
+        request.state.user = user
+        return await call_next(request)
+
+
+def build_app(middleware_class) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(middleware_class)
+    app.include_router(user_router, prefix=settings.API_V1_STR)
+    return app
+
+
+def seed_user():
+    user = UserProfile(
+        id="0" * 32,
+        username=USERNAME,
+        hashed_password="",
+        is_active=True,
+        created_at=time.strftime("%Y-%m-%d"),
+    )
+    user_cache.set(USERNAME, user, ttl=3600)
+
+
+async def run(app: FastAPI, total: int, concurrency: int) -> float:
+    headers = {"X-Forwarded-User": f"Bearer {create_access_token({'username': USERNAME})}"}
+    transport = httpx.ASGITransport(app=app)
+    queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(None)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # 预热
+        response = await client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+        assert response.status_code == 200, response.text
+
+        async def worker():
+            while not queue.empty():
+                queue.get_nowait()
+                await client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return total / elapsed
+
+
+async def main(total: int, concurrency: int):
+    seed_user()
+    results = {}
+    for name, middleware_class in (("BaseHTTPMiddleware", LegacyAuthMiddleware), ("pure ASGI", AuthMiddleware)):
+        results[name] = await run(build_app(middleware_class), total, concurrency)
+        print(f"{name:<20} {results[name]:>10.1f} req/s")
+    print(f"{'speedup':<20} {results['pure ASGI'] / results['BaseHTTPMiddleware']:>10.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000, help="每种实现的请求总数")
+    parser.add_argument("--concurrency", type=int, default=50, help="并发数")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -0,0 +1,337 @@
+"""
+v1 接口压测：按场景发送请求，统计 p50 / p95 / p99 延迟、吞吐量和每个请求的 SQL 语句数，
+可保存为基线并与之前的基线对比（用于判断 AuthMiddleware / get_db / TripService 的改动是变好还是变坏）。
+
+场景：
+    login                       登录（含 bcrypt 校验）
+    users_me                    GET /users/me
+    list:<filter>:<sort_by>     GET /trips/list，filter 为 all / owner_id / is_pinned / city / style_tag，
+                                sort_by 为 TRIP_SORTS 中的每种排序
+    favorite_toggle             对随机旅程交替收藏 / 取消收藏
+
+默认在进程内通过 ASGI 直接调用应用并统计 SQL 语句数；--base-url 压测已启动的服务，
+语句数取自 Server-Timing 响应头（SQL_SERVER_TIMING 关闭时不统计）。
+数据需先用 benchmarks.seed_data 生成，DATABASE_URL 与生成数据时一致。
+
+运行（在项目根目录）：
+    python -m benchmarks.load_test --requests 500 --concurrency 20 --save-baseline mysql-100k
+    python -m benchmarks.load_test --scenarios "list:*" --compare mysql-100k
+"""
+import argparse
+import asyncio
+import fnmatch
+import json
+import math
+import platform
+import random
+import re
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+from sqlalchemy import func, select
+
+from app.config import settings
+from app.database import AsyncSessionLocal, engine, close_db
+from app.models import Trip, UserProfile
+from app.routers.v1.api import router  # noqa: F401  先加载路由，避免 services 与 routers 的循环导入
+from app.services.auth import create_access_token
+from app.services.trip import trip_list_cache, TRIP_SORTS
+from app.utils.logging import logger
+from app.utils.query_stats import query_budget
+from benchmarks.seed_data import CITIES, STYLE_TAGS, PASSWORD, user_id, username
+
+BASELINE_DIR = Path(__file__).parent / "baselines"
+
+# 预先签发 Token 的用户数（请求在这些用户中随机选择）
+TOKEN_USERS = 1000
+LIST_FILTERS = ["all", "owner_id", "is_pinned", "city", "style_tag"]
+
+# 每请求语句数增加到此值以上视为回归（过滤缓存过期等带来的小幅波动）
+STATEMENT_TOLERANCE = 0.5
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+class Dataset:
+    """库中已生成的数据规模，以及预先签发的 Token"""
+
+    def __init__(self, users: int, min_trip_id: int, max_trip_id: int):
+        self.users = users
+        self.min_trip_id = min_trip_id
+        self.max_trip_id = max_trip_id
+        self.tokens = [create_access_token({"username": username(i)}) for i in range(min(users, TOKEN_USERS))]
+
+    def user(self, rng: random.Random) -> int:
+        return rng.randrange(len(self.tokens))
+
+    def headers(self, index: int) -> dict:
+        return {"X-Forwarded-User": f"Bearer {self.tokens[index]}"}
+
+    def trip_id(self, rng: random.Random) -> int:
+        return rng.randint(self.min_trip_id, self.max_trip_id)
+
+    def as_dict(self) -> dict:
+        return {"users": self.users, "trips": self.max_trip_id - self.min_trip_id + 1}
+
+
+async def load_dataset() -> Dataset:
+    async with AsyncSessionLocal() as db:
+        users = await db.scalar(select(func.count(UserProfile.id)))
+        min_trip_id, max_trip_id = (await db.execute(select(func.min(Trip.id), func.max(Trip.id)))).one()
+    if not users or max_trip_id is None:
+        raise SystemExit("No benchmark data found, run `python -m benchmarks.seed_data` first")
+    return Dataset(users, min_trip_id, max_trip_id)
+
+
+# ---------------------------------------------------------------- 场景
+# 每个场景根据随机数生成器返回一个请求 (method, path, httpx 参数)
+
+
+def login(rng, ds, state):
+    return "POST", "/user/login", {"json": {"username": username(ds.user(rng)), "password": PASSWORD}}
+
+
+def users_me(rng, ds, state):
+    return "GET", "/users/me", {"headers": ds.headers(ds.user(rng))}
+
+
+def list_trips(filter_type: str, sort_by: str):
+    def build(rng, ds, state):
+        params = {"sort_by": sort_by, "current": rng.randint(1, 5), "page_size": 10}
+        if filter_type == "owner_id":
+            params["filter_value"] = user_id(rng.randrange(ds.users))
+        elif filter_type == "is_pinned":
+            params["filter_value"] = "true"
+        elif filter_type == "city":
+            params["filter_value"] = rng.choice(CITIES)
+        elif filter_type == "style_tag":
+            params["filter_value"] = rng.choice(STYLE_TAGS)
+        if filter_type != "all":
+            params["filter_type"] = filter_type
+        return "GET", "/trips/list", {"params": params, "headers": ds.headers(ds.user(rng))}
+
+    return build
+
+
+def favorite_toggle(rng, ds, state):
+    pair = (ds.user(rng), ds.trip_id(rng))
+    action = "unfavorite" if pair in state else "favorite"
+    state ^= {pair}
+    return "POST", f"/trips/{pair[1]}/{action}", {"headers": ds.headers(pair[0])}
+
+
+SCENARIOS = {"login": login, "users_me": users_me}
+SCENARIOS.update({
+    f"list:{filter_type}:{sort_by}": list_trips(filter_type, sort_by)
+    for filter_type in LIST_FILTERS
+    for sort_by in TRIP_SORTS
+})
+SCENARIOS["favorite_toggle"] = favorite_toggle
+
+
+# ---------------------------------------------------------------- 执行与统计
+
+
+def percentile(sorted_values: list, p: float) -> float:
+    """最近秩法百分位"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+async def run_scenario(client, name, build, ds, total, concurrency, warmup, seed, in_process) -> dict:
+    rng = random.Random(f"{seed}:{name}")
+    state = set()
+    # 先生成全部请求，使请求序列与并发调度无关
+    plan = [build(rng, ds, state) for _ in range(warmup + total)]
+    prefix = settings.API_V1_STR
+
+    for method, path, kwargs in plan[:warmup]:
+        await client.request(method, prefix + path, **kwargs)
+
+    requests = iter(plan[warmup:])
+    latencies = []
+    statuses = Counter()
+    failures = 0
+    # 压测远程服务时，从 Server-Timing 响应头读取每个请求的语句数
+    timed_statements = timed_responses = 0
+
+    async def worker():
+        nonlocal failures, timed_statements, timed_responses
+        for method, path, kwargs in requests:
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, prefix + path, **kwargs)
+                statuses[response.status_code] += 1
+                match = SERVER_TIMING_QUERIES.search(response.headers.get("server-timing", ""))
+                if match:
+                    timed_statements += int(match.group(1))
+                timed_responses += 1
+            except httpx.HTTPError:
+                failures += 1
+            latencies.append(time.perf_counter() - start)
+
+    # 进程内压测：各请求的 QueryStats 汇总到外层统计（含只读副本上执行的语句）
+    with query_budget() as stats:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+        "statements_per_request": (
+            round(stats.statements / total, 2) if in_process
+            else round(timed_statements / timed_responses, 2) if timed_statements else None
+        ),
+        "errors": failures + sum(n for code, n in statuses.items() if code >= 500),
+        "non_2xx": {str(code): n for code, n in sorted(statuses.items()) if not 200 <= code < 300},
+    }
+
+
+def print_report(results: dict):
+    print(f"{'scenario':<32} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'stmt/req':>9}  non-2xx")
+    for name, r in results.items():
+        statements = "-" if r["statements_per_request"] is None else f"{r['statements_per_request']:.2f}"
+        print(
+            f"{name:<32} {r['throughput_rps']:>9.1f} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} "
+            f"{r['p99_ms']:>9.2f} {statements:>9}  {r['non_2xx'] or ''}"
+        )
+
+
+def baseline_path(name: str) -> Path:
+    path = Path(name)
+    return path if path.suffix == ".json" else BASELINE_DIR / f"{name}.json"
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> bool:
+    """
+    与基线对比，p95 变慢或吞吐量下降超过 tolerance、或每请求语句数增加 STATEMENT_TOLERANCE 以上时视为回归
+    :return: 是否有回归
+    """
+    regressed = False
+    print(f"\n{'scenario':<32} {'p95 ms':>19} {'req/s':>19} {'stmt/req':>13}")
+    for name, r in results.items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:<32} (not in baseline)")
+            continue
+        p95_change = r["p95_ms"] / base["p95_ms"] - 1 if base["p95_ms"] else 0.0
+        rps_change = r["throughput_rps"] / base["throughput_rps"] - 1 if base["throughput_rps"] else 0.0
+        statements, base_statements = r["statements_per_request"], base.get("statements_per_request")
+        more_statements = (
+            statements is not None and base_statements is not None
+            and statements >= base_statements + STATEMENT_TOLERANCE
+        )
+        bad = p95_change > tolerance or rps_change < -tolerance or more_statements
+        regressed |= bad
+        print(
+            f"{name:<32} {base['p95_ms']:>8.2f} {p95_change:>+9.1%} "
+            f"{base['throughput_rps']:>8.1f} {rps_change:>+9.1%} "
+            f"{base_statements if base_statements is not None else '-':>6} -> {statements if statements is not None else '-':<5}"
+            f"{'  REGRESSION' if bad else ''}"
+        )
+    return regressed
+
+
+async def main(args) -> int:
+    names = [
+        name for name in SCENARIOS
+        if any(fnmatch.fnmatchcase(name, pattern) for pattern in args.scenarios)
+    ]
+    if not names:
+        raise SystemExit(f"No scenario matches {args.scenarios}, available: {', '.join(SCENARIOS)}")
+
+    ds = await load_dataset()
+    if args.base_url:
+        transport, base_url = None, args.base_url
+    else:
+        # 压测用少量用户反复请求，不能被限流（需在导入 app.main 之前设置，中间件在导入时注册）
+        settings.RATE_LIMIT_ENABLED = False
+        from app.main import app
+
+        # 进程内压测：访问日志只写文件，不刷屏
+        logger.level = "WARNING"
+        if not args.list_cache:
+            trip_list_cache.ttl = 0
+        transport, base_url = httpx.ASGITransport(app=app), "http://bench"
+
+    results = {}
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, limits=limits, timeout=60) as client:
+        # 预热鉴权用户缓存，避免各场景的语句数受缓存冷热影响
+        for index in range(len(ds.tokens)):
+            await client.get(f"{settings.API_V1_STR}/users/me", headers=ds.headers(index))
+        for name in names:
+            results[name] = await run_scenario(
+                client, name, SCENARIOS[name], ds, args.requests, args.concurrency, args.warmup, args.seed, not args.base_url
+            )
+            if args.verbose:
+                print_report({name: results[name]})
+    await close_db()
+
+    print_report(results)
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "dialect": engine.dialect.name,
+            "target": args.base_url or "in-process",
+            "dataset": ds.as_dict(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "list_cache": bool(args.list_cache),
+        },
+        "results": results,
+    }
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    if args.save_baseline:
+        path = baseline_path(args.save_baseline)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, indent=2))
+        print(f"\nBaseline saved to {path}")
+    if args.compare:
+        baseline = json.loads(baseline_path(args.compare).read_text())
+        if baseline["meta"]["dataset"] != report["meta"]["dataset"]:
+            print(f"\nWarning: dataset differs from baseline {baseline['meta']['dataset']}")
+        if compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", default=["*"], help="要运行的场景（支持通配符，如 'list:*'）")
+    parser.add_argument("--requests", type=int, default=500, help="每个场景的请求数")
+    parser.add_argument("--concurrency", type=int, default=20, help="并发数")
+    parser.add_argument("--warmup", type=int, default=20, help="每个场景正式计时前的预热请求数")
+    parser.add_argument("--seed", type=int, default=42, help="请求序列的随机种子")
+    parser.add_argument("--base-url", help="压测已启动的服务（如 http://localhost:8000），默认进程内调用")
+    parser.add_argument("--list-cache", action="store_true", help="保留 /trips/list 响应缓存（默认关闭以测量查询本身）")
+    parser.add_argument("--output", help="结果写入 JSON 文件")
+    parser.add_argument("--save-baseline", help="保存为基线（名称或 .json 路径，名称保存在 benchmarks/baselines/）")
+    parser.add_argument("--compare", help="与基线对比，出现回归时以非零状态退出")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许的 p95 / 吞吐量波动比例")
+    parser.add_argument("--verbose", action="store_true", help="每个场景结束后立即输出结果")
+    sys.exit(asyncio.run(main(parser.parse_args())))
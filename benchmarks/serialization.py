@@ -0,0 +1,79 @@
+"""
+响应序列化基准：对比 CommonResponse.success 的默认路径（jsonable_encoder + JSONResponse）
+与按响应模型预编译的序列化路径（schema=TripResponse，有 orjson 时使用 orjson）。
+
+运行（在项目根目录）：
+    python -m benchmarks.serialization --rows 1000 10000
+"""
+import argparse
+import json
+import time
+from datetime import date, datetime, timedelta
+
+from app.models import Trip
+from app.routers.v1.api import router  # noqa: F401  先加载路由，避免 services 与 routers 的循环导入
+from app.routers.v1.trip.schemas import TripResponse
+from app.utils.response.response import CommonResponse
+from app.utils.response.serializer import orjson
+
+
+def make_trips(count: int):
+    """构造与查询结果相同形态的 ORM 对象（含 JSON 字段）"""
+    created_at = datetime(2024, 1, 1, 8, 30)
+    trips = []
+    for i in range(count):
+        trip = Trip(
+            id=i + 1,
+            owner_id=f"{i % 97:032x}",
+            title=f"Trip {i}",
+            start_date=date(2024, 1, 1) + timedelta(days=i % 365),
+            duration=1 + i % 14,
+            cities=[
+                {"name": "Kyoto", "order": 1, "arrival": "2024-01-01T09:00:00"},
+                {"name": "Osaka", "order": 2, "arrival": "2024-01-03T18:00:00"},
+            ],
+            style_tags=["foodie", "culture"],
+            settings={"transport": ["train", "walk"], "budget": "medium"},
+            is_pinned=i % 10 == 0,
+            pin_order=0,
+            favorite_count=i % 50,
+            created_at=created_at + timedelta(minutes=i),
+        )
+        trip.is_favorited = i % 3 == 0
+        trips.append(trip)
+    return trips
+
+
+def measure(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(row_counts, repeat: int):
+    print(f"JSON backend: {'orjson' if orjson is not None else 'json'}")
+    print(f"{'rows':>8} {'jsonable_encoder':>18} {'serializer':>12} {'speedup':>9}")
+    for count in row_counts:
+        trips = make_trips(count)
+
+        default_body = CommonResponse.success(data=trips).body
+        fast_body = CommonResponse.success(data=trips, schema=TripResponse).body
+        assert json.loads(default_body) == json.loads(fast_body), "serializer output differs from jsonable_encoder"
+
+        default_time = measure(lambda: CommonResponse.success(data=trips), repeat)
+        fast_time = measure(lambda: CommonResponse.success(data=trips, schema=TripResponse), repeat)
+        print(
+            f"{count:>8} {default_time * 1000:>16.1f}ms {fast_time * 1000:>10.1f}ms "
+            f"{default_time / fast_time:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000], help="每次响应的旅程数")
+    parser.add_argument("--repeat", type=int, default=5, help="每组重复次数（取最快一次）")
+    args = parser.parse_args()
+    main(args.rows, args.repeat)
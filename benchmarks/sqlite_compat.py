@@ -0,0 +1,31 @@
+"""
+SQLite 替身适配：在没有 MySQL 时，用 SQLite（需安装 aiosqlite）跑基准数据生成和压测。
+只调整建表语句中 SQLite 不支持的 MySQL 写法，不影响应用代码；结果只能用于同一环境下的前后对比，
+不能代表 MySQL 上的绝对性能。
+
+    DATABASE_URL=sqlite+aiosqlite:///./bench.db python -m benchmarks.seed_data ...
+"""
+from sqlalchemy import text
+from sqlalchemy.dialects.mysql import ENUM
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.schema import DefaultClause
+
+from app.config import settings
+
+
+def is_sqlite() -> bool:
+    return settings.DATABASE_URL.startswith("sqlite")
+
+
+@compiles(ENUM, "sqlite")
+def _compile_enum(type_, compiler, **kw):
+    return "VARCHAR(20)"
+
+
+def patch_metadata(metadata):
+    """去掉 SQLite 不支持的 ON UPDATE CURRENT_TIMESTAMP（只影响本进程内的建表）"""
+    for table in metadata.tables.values():
+        for column in table.columns:
+            default = column.server_default
+            if isinstance(default, DefaultClause) and "ON UPDATE" in str(getattr(default.arg, "text", "")).upper():
+                column.server_default = DefaultClause(text("CURRENT_TIMESTAMP"))
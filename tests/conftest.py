@@ -0,0 +1,87 @@
+import os
+import tempfile
+
+# 在导入 app 之前确定配置：未指定数据库时使用临时目录中的 SQLite 替身（需安装 aiosqlite），
+# 依赖 MySQL 的用例（如 EXPLAIN）会自动跳过；日志写到临时目录，不在仓库中留下文件
+_TMP_DIR = tempfile.mkdtemp(prefix="trip-api-tests-")
+os.environ.setdefault("ENV", "test")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_TMP_DIR}/test.db")
+os.environ.setdefault("LOG_PATH", os.path.join(_TMP_DIR, "server.log"))
+# 列表响应缓存默认关闭，避免用例之间互相命中；缓存用例自行创建 ResponseCache
+os.environ.setdefault("TRIP_LIST_CACHE_TTL", "0")
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.routers.v1.api import router  # noqa: E402  先加载路由，避免 services 与 routers 的循环导入
+from app.config import settings  # noqa: E402
+from app.dependencies import get_current_user, get_optional_user  # noqa: E402
+from app.utils.errors.exceptions import ServerException  # noqa: E402
+from app.utils.errors.handler import server_exception_handler  # noqa: E402
+from app.database import AsyncSessionLocal, Base, close_db, engine  # noqa: E402
+from app.models import UserProfile  # noqa: E402
+from benchmarks import sqlite_compat  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def is_mysql() -> bool:
+    return engine.dialect.name == "mysql"
+
+
+@pytest.fixture
+async def schema():
+    """
+    每个用例重建全部表，结束后关闭连接池（连接绑定在用例的事件循环上，不能跨用例复用）。
+    在 MySQL 上运行时会清空 DATABASE_URL 指向的库，请使用专门的测试库。
+    """
+    if sqlite_compat.is_sqlite():
+        sqlite_compat.patch_metadata(Base.metadata)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    yield
+    await close_db()
+
+
+@pytest.fixture
+async def db(schema):
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+async def create_user(db, username: str) -> UserProfile:
+    """直接写入用户（测试环境的 passlib / bcrypt 版本不兼容，不走注册接口）"""
+    user = UserProfile(username=username, hashed_password="x")
+    db.add(user)
+    await db.commit()
+    return user
+
+
+def trip_item(title: str = "trip", cities=("Beijing",), tags=("food",)) -> dict:
+    return {
+        "title": title,
+        "start_date": "2024-05-01",
+        "duration": 3,
+        "cities": [{"name": name, "order": index} for index, name in enumerate(cities)],
+        "style_tags": list(tags),
+        "settings": {},
+    }
+
+
+def api_client(user: UserProfile = None) -> httpx.AsyncClient:
+    """
+    只挂载 v1 路由的应用（不导入 app.main，避开中间件和启动事件），请求路径不含 API 前缀。
+    user 为当前登录用户，None 表示匿名访问。
+    """
+    app = FastAPI()
+    app.include_router(router, prefix=settings.API_V1_STR)
+    app.add_exception_handler(ServerException, server_exception_handler)
+    app.dependency_overrides[get_optional_user] = lambda: user
+    if user is not None:
+        app.dependency_overrides[get_current_user] = lambda: user
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url=f"http://test{settings.API_V1_STR}")
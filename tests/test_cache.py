@@ -0,0 +1,126 @@
+import pytest
+from starlette.responses import JSONResponse
+
+from app.utils.cache import ResponseCache, create_backend
+
+pytestmark = pytest.mark.anyio
+
+BACKENDS = ["", "fake://"]
+
+
+def make_cache(url: str, write_grace: float = 0) -> ResponseCache:
+    return ResponseCache("test", create_backend("test", url, maxsize=100, ttl=60), ttl=60, write_grace=write_grace)
+
+
+@pytest.mark.parametrize("url", BACKENDS)
+async def test_cached_response_etag_and_304(url):
+    cache = make_cache(url)
+    key = await cache.key(page=1)
+    assert await cache.get(key) is None
+
+    stored = await cache.set(key, JSONResponse({"data": [1, 2]}))
+    cached = await cache.get(key)
+    assert cached.body == stored.body and cached.etag == stored.etag == ResponseCache.etag(stored.body)
+
+    response = cached.to_response()
+    assert response.status_code == 200 and response.headers["etag"] == cached.etag
+    for if_none_match in (cached.etag, f'"other", W/{cached.etag}', "*"):
+        not_modified = cached.to_response(if_none_match)
+        assert not_modified.status_code == 304 and not_modified.body == b""
+    assert cached.to_response('"other"').status_code == 200
+
+
+@pytest.mark.parametrize("url", BACKENDS)
+async def test_key_ignores_param_order_and_none(url):
+    cache = make_cache(url)
+    assert await cache.key(a=1, b=2, c=None) == await cache.key(b=2, a=1)
+    assert await cache.key(a=1) != await cache.key(a=2)
+
+
+@pytest.mark.parametrize("url", BACKENDS)
+async def test_invalidate_changes_key_generation(url):
+    cache = make_cache(url)
+    key = await cache.key(page=1)
+    await cache.set(key, JSONResponse({"data": 1}))
+    await cache.invalidate()
+    new_key = await cache.key(page=1)
+    assert new_key != key
+    assert await cache.get(new_key) is None
+
+
+@pytest.mark.parametrize("url", BACKENDS)
+async def test_no_caching_within_write_grace(url):
+    cache = make_cache(url, write_grace=60)
+    await cache.invalidate()
+    key = await cache.key(page=1)
+    # 失效后的宽限期内（副本可能尚未追上写入）只返回 ETag，不写入缓存
+    stored = await cache.set(key, JSONResponse({"data": "maybe stale"}))
+    assert stored.etag and await cache.get(key) is None
+
+
+async def test_non_200_responses_are_not_cached():
+    cache = make_cache("")
+    key = await cache.key(page=1)
+    await cache.set(key, JSONResponse({"error": "x"}, status_code=400))
+    assert await cache.get(key) is None
+
+
+def test_memory_cache_disabled_with_multiple_workers(monkeypatch):
+    from app.config import settings
+    from app.services.trip.cache import _cache_ttl
+
+    monkeypatch.setattr(settings, "TRIP_LIST_CACHE_TTL", 30)
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 4)
+    monkeypatch.setattr(settings, "TRIP_LIST_CACHE_URL", "")
+    assert _cache_ttl() == 0
+    monkeypatch.setattr(settings, "TRIP_LIST_CACHE_URL", "fake://")
+    assert _cache_ttl() == 30
+    monkeypatch.setattr(settings, "TRIP_LIST_CACHE_URL", "")
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 1)
+    assert _cache_ttl() == 30
+
+
+@pytest.mark.parametrize("url", BACKENDS)
+async def test_trip_list_etag_and_invalidation(db, monkeypatch, url):
+    from app.services.trip import TripService, trip_list_cache
+    from tests.conftest import api_client, create_user, trip_item
+
+    monkeypatch.setattr(trip_list_cache, "backend", create_backend("trip_list", url, maxsize=100, ttl=60))
+    monkeypatch.setattr(trip_list_cache, "ttl", 60)
+    alice = await create_user(db, "alice")
+    await TripService.bulk_create_trips(db, [trip_item("first")], alice.id, 10)
+
+    async with api_client() as client:
+        first = await client.get("/trips/list")
+        etag = first.headers["etag"]
+        assert [trip["title"] for trip in first.json()["data"]] == ["first"]
+        assert (await client.get("/trips/list", headers={"If-None-Match": etag})).status_code == 304
+
+        await TripService.bulk_create_trips(db, [trip_item("second")], alice.id, 10)
+        after_write = await client.get("/trips/list", headers={"If-None-Match": etag})
+        assert after_write.status_code == 200 and after_write.headers["etag"] != etag
+        assert len(after_write.json()["data"]) == 2
+
+
+class BrokenBackend:
+    """模拟不可用的共享缓存后端（如 Redis 宕机）"""
+
+    async def _fail(self, *args, **kwargs):
+        raise ConnectionError("cache backend down")
+
+    get = set = get_counter = incr = _fail
+
+
+async def test_trip_list_served_from_database_when_cache_is_down(db, monkeypatch):
+    from app.services.trip import TripService, trip_list_cache
+    from tests.conftest import api_client, create_user, trip_item
+
+    monkeypatch.setattr(trip_list_cache, "backend", BrokenBackend())
+    monkeypatch.setattr(trip_list_cache, "ttl", 60)
+    alice = await create_user(db, "alice")
+    await TripService.bulk_create_trips(db, [trip_item("first")], alice.id, 10)
+
+    async with api_client() as client:
+        response = await client.get("/trips/list")
+    assert response.status_code == 200
+    assert [trip["title"] for trip in response.json()["data"]] == ["first"]
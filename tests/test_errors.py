@@ -0,0 +1,28 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.services.auth.security import PasswordHasher
+from app.utils.errors.exceptions import ServerException
+from app.utils.errors.handler import server_exception_handler
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_busy_password_hasher_returns_503_with_retry_after():
+    hasher = PasswordHasher(max_workers=1, max_pending=0)
+    app = FastAPI()
+    app.add_exception_handler(ServerException, server_exception_handler)
+
+    @app.post("/login")
+    async def login():
+        await hasher.verify("password", "hash")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/login")
+    hasher.shutdown()
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert response.json() == {"code": 503, "error": "Server busy, please retry later"}
@@ -0,0 +1,101 @@
+"""
+索引回归检查：执行 TripService 的主要方法，记录它们实际发出的 SQL 和参数，逐条 EXPLAIN，
+出现全表扫描（type=ALL）或本应按索引顺序读取的列表查询出现 Using filesort 时失败。
+需连接 MySQL（DATABASE_URL 指向专门的测试库，会被清空重建），SQLite 替身下跳过。
+"""
+import pytest
+from sqlalchemy import event, select, text
+
+from app.database import AsyncSessionLocal, engine
+from app.models import Trip, UserProfile
+from app.services.trip import TripService
+from app.utils.response.response import PageQuery
+from benchmarks.seed_data import CITIES, STYLE_TAGS, seed, user_id
+from tests.conftest import is_mysql
+
+pytestmark = [
+    pytest.mark.anyio,
+    pytest.mark.skipif(not is_mysql(), reason="EXPLAIN checks require MySQL"),
+]
+
+# 数据太少时 MySQL 可能主动选择全表扫描，需要一定的数据量
+USERS, TRIPS, FAVORITES = 200, 20000, 5000
+
+FILTERS = [
+    (None, None),
+    ("owner_id", user_id(1)),
+    ("is_pinned", "true"),
+    ("city", CITIES[0]),
+    ("style_tag", STYLE_TAGS[0]),
+]
+
+# 有对应 (过滤列, 排序列, id) 索引、应直接按索引顺序读取的组合；
+# city / style_tag 为子查询过滤，执行计划取决于选择性，只检查是否全表扫描
+INDEX_ORDERED = {
+    (None, "id"), (None, "start_date"), (None, "created_at"),
+    ("owner_id", "start_date"), ("owner_id", "created_at"),
+    ("is_pinned", "start_date"), ("is_pinned", "pin_order"),
+}
+
+
+class StatementRecorder:
+    """记录当前名称下执行的 SQL（只记录 SELECT / UPDATE / DELETE）"""
+
+    def __init__(self):
+        self.name = None
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if self.name and statement.lstrip().split(None, 1)[0].upper() in ("SELECT", "UPDATE", "DELETE"):
+            self.statements.append((self.name, statement, parameters))
+
+
+@pytest.fixture
+async def recorded_statements(schema):
+    await seed(USERS, TRIPS, FAVORITES, seed_value=42, batch_size=2000, reset=False)
+    async with engine.begin() as conn:
+        await conn.execute(text("ANALYZE TABLE trips, trip_cities, trip_tags, user_favorites"))
+
+    recorder = StatementRecorder()
+    event.listen(engine.sync_engine, "before_cursor_execute", recorder)
+    try:
+        async with AsyncSessionLocal() as db:
+            user = await db.get(UserProfile, user_id(1))
+            for filter_type, filter_value in FILTERS:
+                for sort_by in ("id", "start_date", "-start_date", "created_at", "-created_at", "pin_order"):
+                    recorder.name = ("list", filter_type, sort_by.lstrip("-"))
+                    page = PageQuery(current=3, page_size=10)
+                    trips, _ = await TripService.list_trips_page(db, page, filter_type, filter_value, sort_by)
+                    await TripService.annotate_favorites(db, trips, user)
+                    _, cursor = await TripService.list_trips_by_cursor(db, 10, None, filter_type, filter_value, sort_by)
+                    if cursor:
+                        await TripService.list_trips_by_cursor(db, 10, cursor, filter_type, filter_value, sort_by)
+            recorder.name = ("my_favorite",)
+            await TripService.my_favorite(db, user)
+            recorder.name = None
+            owned_trip = await db.scalar(select(Trip.id).where(Trip.owner_id == user.id).limit(1))
+            recorder.name = ("pin_trip",)
+            await TripService.pin_trip(db, str(owned_trip), user)
+            recorder.name = ("favorite",)
+            await TripService.favorite_trip(db, "2", user)
+            await TripService.unfavorite_trip(db, "2", user)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", recorder)
+    assert recorder.statements
+    return recorder.statements
+
+
+async def test_service_queries_use_indexes(recorded_statements):
+    full_scans, filesorts = [], []
+    async with engine.connect() as conn:
+        for name, statement, parameters in recorded_statements:
+            rows = (await conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)).mappings().all()
+            plan = ", ".join(f"{row['table']}:{row['type']}:{row['key']}:{row['Extra']}" for row in rows)
+            if any(row["type"] == "ALL" for row in rows):
+                full_scans.append(f"{name} {statement} -> {plan}")
+            if (name[0] == "list" and name[1:] in INDEX_ORDERED) or name[0] == "my_favorite":
+                if " ORDER BY " in statement and any("Using filesort" in (row["Extra"] or "") for row in rows):
+                    filesorts.append(f"{name} {statement} -> {plan}")
+
+    assert not full_scans, "Full table scans:\n" + "\n".join(full_scans)
+    assert not filesorts, "Unexpected filesort:\n" + "\n".join(filesorts)
@@ -0,0 +1,86 @@
+import json
+import os
+
+from app.utils.metrics import MetricsRegistry, _process_start
+
+
+def _registry(multiproc_dir=None):
+    registry = MetricsRegistry(multiproc_dir=multiproc_dir)
+    requests = registry.counter("requests_total", "Requests", ("route",))
+    in_flight = registry.gauge("in_flight", "In flight")
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1))
+    return registry, requests, in_flight, latency
+
+
+def _write_snapshot(directory, name, pid, start=None, exited=False, requests=1, in_flight=1, latency=None):
+    other, counter, gauge, histogram = _registry()
+    counter.inc(requests, route="/a")
+    gauge.set(in_flight)
+    for value in latency or ():
+        histogram.observe(value)
+    with open(os.path.join(directory, f"metrics_{name}.json"), "w") as f:
+        json.dump({"pid": pid, "start": start, "time": 0, "exited": exited,
+                   "metrics": {n: m.dump() for n, m in other.metrics.items()}}, f)
+
+
+def test_render_text_format():
+    registry, requests, in_flight, latency = _registry()
+    requests.inc(route='/a"b\n')
+    requests.inc(2, route="/c")
+    in_flight.set(1.5)
+    for value in (0.05, 0.5, 5):
+        latency.observe(value)
+
+    lines = registry.render().splitlines()
+    assert lines[:4] == [
+        "# HELP requests_total Requests",
+        "# TYPE requests_total counter",
+        'requests_total{route="/a\\"b\\n"} 1',
+        'requests_total{route="/c"} 2',
+    ]
+    assert "in_flight 1.5" in lines
+    # 分桶为累计计数，+Inf 桶等于总数
+    assert lines[-5:] == [
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1"} 2',
+        'latency_seconds_bucket{le="+Inf"} 3',
+        "latency_seconds_sum 5.55",
+        "latency_seconds_count 3",
+    ]
+
+
+def test_multiprocess_merge(tmp_path):
+    registry, requests, in_flight, latency = _registry(str(tmp_path))
+    requests.inc(route="/a")
+    in_flight.set(2)
+    latency.observe(0.5)
+
+    pid = os.getpid()
+    # 存活的其他进程（以本进程模拟）：全部计入
+    _write_snapshot(tmp_path, "alive", pid, start=_process_start(pid), requests=3, in_flight=4, latency=[0.05])
+    # 已退出的进程：计数保留，gauge 不计入
+    _write_snapshot(tmp_path, "exited", pid, exited=True, requests=5, in_flight=100)
+    _write_snapshot(tmp_path, "dead", 2 ** 22 + 1, requests=7, in_flight=100)
+    # PID 被复用（启动时间不同）：按已退出处理
+    _write_snapshot(tmp_path, "reused", pid, start="0", requests=11, in_flight=100)
+    # 写到一半的文件跳过
+    (tmp_path / "metrics_broken.json").write_text("{")
+
+    lines = registry.render().splitlines()
+    assert 'requests_total{route="/a"} 27' in lines
+    assert "in_flight 6" in lines
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert "latency_seconds_count 2" in lines
+
+
+def test_flush_file_is_per_process_instance(tmp_path):
+    first, requests, _, _ = _registry(str(tmp_path))
+    second, other_requests, _, _ = _registry(str(tmp_path))
+    requests.inc(route="/a")
+    other_requests.inc(route="/a")
+    first.flush()
+    second.flush(exited=True)
+
+    # 同一 PID 的两个注册表（模拟 PID 复用）写入不同文件，互不覆盖
+    assert len(list(tmp_path.glob("metrics_*.json"))) == 2
+    assert 'requests_total{route="/a"} 2' in first.render().splitlines()
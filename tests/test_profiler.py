@@ -0,0 +1,61 @@
+import sys
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from app.utils.profiler import LoopLagMonitor, SamplingProfiler, _is_idle, collapse_frame
+
+pytestmark = pytest.mark.anyio
+
+
+def _frame(*names):
+    """按从根到栈顶的顺序构造假栈帧，返回栈顶"""
+    frame = None
+    for line, name in enumerate(names, start=1):
+        code = SimpleNamespace(co_name=name, co_filename=f"/usr/lib/python3/{name};x.py", co_firstlineno=line)
+        frame = SimpleNamespace(f_code=code, f_back=frame)
+    return frame
+
+
+def test_collapse_frame_root_first_with_prefix():
+    assert collapse_frame(_frame("main", "handle")) == "main (main:x.py:1);handle (handle:x.py:2)"
+    assert collapse_frame(_frame("main"), prefix="worker") == "worker;main (main:x.py:1)"
+
+
+def test_collapse_frame_uses_project_relative_paths():
+    code = sys._getframe().f_code
+    line = collapse_frame(sys._getframe())
+    assert line.endswith(f"{code.co_name} (tests/test_profiler.py:{code.co_firstlineno})")
+
+
+def test_is_idle_only_for_event_loop_waits():
+    assert _is_idle(_frame("run_forever", "_run_once", "select"))
+    assert _is_idle(_frame("select"))
+    # 业务代码中调用的 select 不算空闲
+    assert not _is_idle(_frame("_run_once", "handler", "select"))
+    assert not _is_idle(_frame("_run_once", "handler"))
+    assert not _is_idle(None)
+
+
+def test_sample_all_threads_names_threads():
+    stop = threading.Event()
+    worker = threading.Thread(target=stop.wait, name="sample-worker")
+    worker.start()
+    try:
+        stacks = SamplingProfiler().sample(threading.get_ident(), 0.05, 0.01, all_threads=True)
+    finally:
+        stop.set()
+        worker.join()
+    assert any(stack.startswith("sample-worker;") for stack in stacks)
+
+
+async def test_loop_lag_monitor_stop_joins_watchdog():
+    monitor = LoopLagMonitor(threshold=1, interval=0.05)
+    monitor.start()
+    watchdog = monitor._watchdog
+    monitor.stop()
+    assert not watchdog.is_alive()
+    monitor.start()
+    monitor.stop()
+    assert [t for t in threading.enumerate() if t.name == "loop-lag-watchdog"] == []
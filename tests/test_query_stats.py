@@ -0,0 +1,113 @@
+import httpx
+import pytest
+from sqlalchemy import text
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.database import AsyncSessionLocal, engine
+from app.middlewares import RequestContextMiddleware
+from app.utils.query_stats import QueryBudgetExceeded, QueryStats, query_budget, query_stats_var, statement_shape
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def dispose_engine():
+    yield
+    await engine.dispose()
+
+
+async def run_select(times: int = 1):
+    async with engine.connect() as conn:
+        for _ in range(times):
+            await conn.execute(text("SELECT 1"))
+
+
+def test_statement_shape_collapses_placeholder_lists():
+    assert statement_shape("SELECT *\n  FROM t WHERE id IN (?, ?, ?)") == "SELECT * FROM t WHERE id IN (?)"
+    assert statement_shape("INSERT INTO t VALUES (%s, %s)") == "INSERT INTO t VALUES (?)"
+
+
+def test_repeated_respects_threshold():
+    stats = QueryStats()
+    for _ in range(3):
+        stats.record("SELECT 1", 0.001, 1)
+    stats.record("SELECT 2", 0.001, 1)
+    assert stats.repeated(3) == [("SELECT 1", 3)]
+    assert stats.repeated(0) == []
+
+
+async def test_query_budget_counts_statements(dispose_engine):
+    with query_budget(max_statements=2, max_repeats=2) as stats:
+        await run_select(2)
+    assert stats.statements == 2
+    assert query_stats_var.get() is None
+
+
+async def test_query_budget_exceeded_statements(dispose_engine):
+    with pytest.raises(QueryBudgetExceeded, match="3 statements"):
+        with query_budget(max_statements=2):
+            await run_select(3)
+
+
+async def test_query_budget_exceeded_repeats(dispose_engine):
+    with pytest.raises(QueryBudgetExceeded, match="SELECT 1"):
+        with query_budget(max_repeats=1):
+            await run_select(2)
+
+
+async def test_nested_budget_accumulates_into_outer(dispose_engine):
+    with query_budget() as outer:
+        with query_budget() as inner:
+            await run_select(2)
+        await run_select(1)
+    assert (inner.statements, outer.statements) == (2, 3)
+
+
+def _stats_app():
+    async def endpoint(request):
+        stats = query_stats_var.get()
+        await run_select()
+        return JSONResponse({"has_parent": stats.parent is not None, "statements": stats.statements})
+
+    return RequestContextMiddleware(Starlette(routes=[Route("/", endpoint)]))
+
+
+async def test_request_stats_do_not_chain_across_in_process_requests(dispose_engine):
+    transport = httpx.ASGITransport(app=_stats_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        for _ in range(3):
+            response = await client.get("/")
+            assert response.json() == {"has_parent": False, "statements": 1}
+            assert "db;dur=" in response.headers["server-timing"]
+            assert query_stats_var.get() is None
+
+
+async def test_request_stats_roll_up_into_query_budget(dispose_engine):
+    transport = httpx.ASGITransport(app=_stats_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        with query_budget(max_statements=3) as stats:
+            for _ in range(3):
+                assert (await client.get("/")).json()["has_parent"] is True
+        assert stats.statements == 3
+        with pytest.raises(QueryBudgetExceeded):
+            with query_budget(max_statements=1):
+                await client.get("/")
+                await client.get("/")
+
+
+async def test_session_connection_hold_time_is_recorded(dispose_engine):
+    with query_budget() as stats:
+        async with AsyncSessionLocal() as session:
+            await session.execute(text("SELECT 1"))
+            held = stats.hold_time
+            await session.execute(text("SELECT 2"))
+        assert held == 0
+        assert stats.hold_time > 0
+    # 统计范围外的会话不再计入
+    hold_time = stats.hold_time
+    async with AsyncSessionLocal() as session:
+        await session.execute(text("SELECT 1"))
+    assert stats.hold_time == hold_time
+    assert stats.as_dict()["hold_ms"] == round(hold_time * 1000, 3)
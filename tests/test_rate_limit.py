@@ -0,0 +1,137 @@
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.datastructures import Headers
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.config import settings
+from app.middlewares import RateLimitMiddleware, _client_ip
+from app.services.auth import create_access_token
+from app.utils.rate_limit import (
+    FakeRateLimitRedis,
+    Limit,
+    MemoryRateLimiter,
+    RateLimitRules,
+    RedisRateLimiter,
+    create_rate_limiter,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+class Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_limit_parse():
+    limit = Limit.parse("10/minute")
+    assert (limit.rate, limit.burst, limit.refill_time) == (10 / 60, 10, 60)
+    assert Limit.parse("5/seconds").rate == 5
+    for spec in ("10", "0/second", "x/minute", "10/week"):
+        with pytest.raises(ValueError):
+            Limit.parse(spec)
+
+
+def test_rules_match():
+    rules = RateLimitRules({
+        "POST /v1/user/login": {"ip": "10/minute"},
+        "/v1/health": {"ip": "1/second"},
+        "PUT /v1/trips/{trip_id}/pin": {"user": "5/second"},
+    })
+    name, limits = rules.match("POST", "/v1/user/login")
+    assert name == "POST /v1/user/login" and set(limits) == {"ip"}
+    assert rules.match("GET", "/v1/user/login") is None
+    assert rules.match("DELETE", "/v1/health")[0] == "/v1/health"
+    assert rules.match("PUT", "/v1/trips/42/pin")[0] == "PUT /v1/trips/{trip_id}/pin"
+    assert rules.match("PUT", "/v1/trips/42/extra/pin") is None
+    assert not RateLimitRules({})
+    with pytest.raises(ValueError):
+        RateLimitRules({"GET /": {"tenant": "1/second"}})
+
+
+@pytest.mark.parametrize("make", [
+    lambda clock: MemoryRateLimiter(clock=clock),
+    lambda clock: RedisRateLimiter(FakeRateLimitRedis(clock=clock)),
+], ids=["memory", "fake-redis"])
+async def test_limiter_refills_and_checks_all_buckets_first(make):
+    clock = Clock()
+    limiter = make(clock)
+    user, ip = Limit.parse("2/second"), Limit.parse("3/second")
+    buckets = [("user:a", user), ("ip:1", ip)]
+
+    assert await limiter.acquire(buckets) == [0, 0]
+    assert await limiter.acquire(buckets) == [0, 0]
+    waits = await limiter.acquire(buckets)
+    assert waits[0] == pytest.approx(0.5) and waits[1] == 0
+
+    # 用户桶拒绝时 IP 桶不扣减：IP 桶还剩 1 个令牌
+    assert await limiter.acquire([("ip:1", ip)]) == [0]
+    assert (await limiter.acquire([("ip:1", ip)]))[0] > 0
+
+    clock.now += 0.5
+    assert await limiter.acquire([("user:a", user)]) == [0]
+    assert (await limiter.acquire([("user:a", user)]))[0] > 0
+
+
+async def test_memory_limiter_evicts_refilled_and_oldest_buckets():
+    clock = Clock()
+    limiter = MemoryRateLimiter(max_keys=2, clock=clock)
+    limit = Limit.parse("1/second")
+    for key in ("a", "b", "c"):
+        await limiter.acquire([(key, limit)])
+    assert list(limiter.buckets) == ["b", "c"]
+    clock.now += 5
+    await limiter.acquire([("d", limit)])
+    assert list(limiter.buckets) == ["d"]
+
+
+async def test_fake_redis_only_runs_token_bucket_script():
+    with pytest.raises(ValueError):
+        await FakeRateLimitRedis().eval("return 1", 0)
+    assert isinstance(create_rate_limiter("fake://", 10).client, FakeRateLimitRedis)
+    assert isinstance(create_rate_limiter("", 10), MemoryRateLimiter)
+
+
+@pytest.mark.parametrize("hops, expected", [(0, "10.0.0.1"), (1, "203.0.113.7"), (2, "198.51.100.2"), (5, "1.1.1.1")])
+def test_client_ip_uses_trusted_hops_from_the_right(monkeypatch, hops, expected):
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUSTED_PROXIES", hops)
+    headers = Headers({"X-Forwarded-For": "1.1.1.1, 198.51.100.2, 203.0.113.7"})
+    assert _client_ip({"client": ("10.0.0.1", 1234)}, headers) == expected
+
+
+def _limited_app(limiter):
+    async def endpoint(request):
+        return PlainTextResponse("ok")
+
+    app = Starlette(routes=[Route("/login", endpoint, methods=["POST"]), Route("/list", endpoint)])
+    rules = {"POST /login": {"ip": "2/minute"}, "GET /list": {"user": "1/minute", "ip": "5/minute"}}
+    return RateLimitMiddleware(app, rules=rules, limiter=limiter)
+
+
+async def test_middleware_returns_429_with_retry_after():
+    transport = httpx.ASGITransport(app=_limited_app(MemoryRateLimiter()))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        assert [(await client.post("/login")).status_code for _ in range(2)] == [200, 200]
+        response = await client.post("/login")
+        assert response.status_code == 429
+        assert response.json() == {"code": 429, "error": "Too many requests"}
+        assert response.headers["retry-after"] == "30"
+        # 未配置规则的方法不限流
+        assert (await client.get("/login")).status_code == 405
+
+
+async def test_middleware_user_rejection_does_not_consume_ip_tokens():
+    limiter = MemoryRateLimiter()
+    transport = httpx.ASGITransport(app=_limited_app(limiter))
+    headers = {"X-Forwarded-User": f"Bearer {create_access_token({'username': 'alice'})}"}
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        statuses = [(await client.get("/list", headers=headers)).status_code for _ in range(3)]
+        assert statuses == [200, 429, 429]
+        # IP 桶只被第一个请求扣减：匿名请求还能通过 4 次
+        statuses = [(await client.get("/list")).status_code for _ in range(5)]
+        assert statuses == [200, 200, 200, 200, 429]
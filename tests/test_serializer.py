@@ -0,0 +1,46 @@
+from datetime import date, datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.models import Trip
+from app.routers.v1.trip.schemas import TripResponse, TripSummary
+from app.utils.response.serializer import ModelSerializer
+
+
+def _trip(**values) -> Trip:
+    defaults = dict(
+        id=1, owner_id="u1", title="trip", start_date=date(2024, 5, 1), duration=3, cities=[], style_tags=[],
+        settings={}, is_pinned=1, pin_order=0, favorite_count=0, created_at=datetime(2024, 5, 1, 12, 30),
+    )
+    return Trip(**dict(defaults, **values))
+
+
+def test_serializer_applies_declared_types():
+    row = ModelSerializer(TripResponse).one(_trip())
+    # 日期时间原样输出，与 jsonable_encoder 一致
+    assert row["created_at"] == datetime(2024, 5, 1, 12, 30)
+    assert row["is_pinned"] is True
+    # 不在对象上的可选字段输出模型默认值
+    assert row["is_favorited"] is False
+    # 字典行只输出已有的键
+    assert ModelSerializer(TripSummary).one({"id": 1, "created_at": None, "is_pinned": 0}) == {
+        "id": 1, "created_at": None, "is_pinned": False,
+    }
+
+
+def test_serializer_reads_attributes_outside_dict():
+    class Row:
+        id = 7
+
+        @property
+        def is_favorited(self):
+            return 1
+
+    assert ModelSerializer(TripSummary, ("id", "is_favorited")).one(Row()) == {"id": 7, "is_favorited": True}
+
+
+def test_serializer_raises_on_missing_required_field():
+    row = SimpleNamespace(id=1, start_date=date(2024, 5, 1))
+    with pytest.raises(ValueError, match="TripResponse.title"):
+        ModelSerializer(TripResponse).many([row])
@@ -0,0 +1,17 @@
+import pytest
+
+from app.config import settings
+from tests.conftest import api_client, create_user
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("path", ["/system/pool", "/system/cache"])
+async def test_system_stats_require_admin(db, monkeypatch, path):
+    monkeypatch.setattr(settings, "ADMIN_USERS", ["admin"])
+    alice = await create_user(db, "alice")
+    admin = await create_user(db, "admin")
+    async with api_client(alice) as client:
+        assert (await client.get(path)).status_code == 403
+    async with api_client(admin) as client:
+        assert (await client.get(path)).status_code == 200
@@ -0,0 +1,151 @@
+import pytest
+from sqlalchemy import select, update
+
+from app.models import Trip, TripCity, TripTag
+from app.services.trip import TripService
+from tests.conftest import api_client, create_user, trip_item
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_bulk_create_trips_links_search_rows_to_inserted_ids(db):
+    alice = await create_user(db, "alice")
+    bob = await create_user(db, "bob")
+    # bob 先建一条旅程，使 alice 的 ID 不从 1 开始
+    await TripService.bulk_create_trips(db, [trip_item("bob-1", cities=("Paris",))], bob.id, batch_size=10)
+
+    items = [trip_item(f"alice-{i}", cities=(f"City{i}",), tags=(f"tag{i}",)) for i in range(5)]
+    items.insert(2, {"title": "invalid"})
+    result = await TripService.bulk_create_trips(db, items, alice.id, batch_size=2)
+
+    assert [error["index"] for error in result["errors"]] == [2]
+    assert [row["index"] for row in result["created"]] == [0, 1, 3, 4, 5]
+    trips = {trip.id: trip for trip in (await db.execute(select(Trip))).scalars()}
+    cities = dict((await db.execute(select(TripCity.trip_id, TripCity.city))).all())
+    tags = dict((await db.execute(select(TripTag.trip_id, TripTag.tag))).all())
+    for row in result["created"]:
+        trip = trips[row["id"]]
+        assert trip.owner_id == alice.id
+        suffix = trip.title.split("-")[1]
+        assert cities[trip.id] == f"City{suffix}"
+        assert tags[trip.id] == f"tag{suffix}"
+
+
+async def test_over_long_city_and_tag_are_rejected_before_insert(db):
+    alice = await create_user(db, "alice")
+    items = [
+        trip_item("long-city", cities=("C" * 101,)),
+        trip_item("long-tag", tags=("t" * 51,)),
+        trip_item("max", cities=(" " + "C" * 100 + " ",), tags=("t" * 50,)),
+    ]
+    result = await TripService.bulk_create_trips(db, items, alice.id, batch_size=10)
+    assert [error["index"] for error in result["errors"]] == [0, 1]
+    assert [row["index"] for row in result["created"]] == [2]
+
+    async with api_client(alice) as client:
+        response = await client.post("/trips/create", json=trip_item(cities=("C" * 101,)))
+    assert response.status_code == 422
+
+
+async def _create_trips(db, owner, count: int) -> list:
+    result = await TripService.bulk_create_trips(db, [trip_item(f"t{i}") for i in range(count)], owner.id, 10)
+    return [row["id"] for row in result["created"]]
+
+
+async def _collect_cursor_pages(client, **params) -> list:
+    ids, cursor = [], None
+    while True:
+        page = (await client.get("/trips/list", params=dict(params, mode="cursor", page_size=1, cursor=cursor))).json()
+        ids.extend(trip["id"] for trip in page["data"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+async def test_list_without_pagination_params_keeps_unpaginated_shape(db):
+    alice = await create_user(db, "alice")
+    ids = await _create_trips(db, alice, 3)
+    async with api_client() as client:
+        body = (await client.get("/trips/list")).json()
+        paged = (await client.get("/trips/list", params={"page_size": 2})).json()
+    assert set(body) == {"code", "msg", "data"}
+    assert sorted(trip["id"] for trip in body["data"]) == ids
+    assert [trip["id"] for trip in paged["list"]] == ids[:2]
+    assert paged["pagination"]["total"] == 3
+
+
+async def test_cursor_pages_cover_rows_with_null_created_at(db):
+    alice = await create_user(db, "alice")
+    ids = await _create_trips(db, alice, 4)
+    await db.execute(update(Trip).where(Trip.id.in_(ids[1:3])).values(created_at=None))
+    await db.commit()
+    async with api_client() as client:
+        assert await _collect_cursor_pages(client) == ids
+        for sort_by in ("created_at", "-created_at"):
+            assert sorted(await _collect_cursor_pages(client, sort_by=sort_by)) == ids
+
+
+async def test_offset_tiebreak_follows_sort_direction(db):
+    alice = await create_user(db, "alice")
+    ids = await _create_trips(db, alice, 3)
+    async with api_client() as client:
+        for sort_by, expected in (("start_date", ids), ("-start_date", ids[::-1])):
+            body = (await client.get("/trips/list", params={"sort_by": sort_by, "current": 1})).json()
+            assert [trip["id"] for trip in body["list"]] == expected
+
+
+async def test_favorite_conflict_and_missing_trip_on_any_backend(db):
+    alice = await create_user(db, "alice")
+    [trip_id] = await _create_trips(db, alice, 1)
+    async with api_client(alice) as client:
+        assert (await client.post(f"/trips/{trip_id}/favorite")).status_code == 200
+        response = await client.post(f"/trips/{trip_id}/favorite")
+        assert response.status_code == 409
+        assert response.json()["error"] == "Trip already favorited"
+        assert (await client.post(f"/trips/{trip_id + 100}/favorite")).status_code == 404
+    trip = await db.get(Trip, trip_id)
+    await db.refresh(trip)
+    assert trip.favorite_count == 1
+
+
+async def test_pin_and_unpin_require_trip_owner(db):
+    alice = await create_user(db, "alice")
+    bob = await create_user(db, "bob")
+    [trip_id] = await _create_trips(db, alice, 1)
+
+    async with api_client() as client:
+        assert (await client.put(f"/trips/{trip_id}/pin")).status_code == 401
+    async with api_client(bob) as client:
+        assert (await client.put(f"/trips/{trip_id}/pin")).status_code == 404
+        assert (await client.put(f"/trips/{trip_id}/unpin")).status_code == 404
+    trip = await db.get(Trip, trip_id)
+    await db.refresh(trip)
+    assert not trip.is_pinned
+
+    async with api_client(alice) as client:
+        assert (await client.put(f"/trips/{trip_id}/pin")).status_code == 200
+    await db.refresh(trip)
+    assert trip.is_pinned
+
+
+async def test_sparse_fields_return_only_requested_keys(db):
+    alice = await create_user(db, "alice")
+    [trip_id] = await _create_trips(db, alice, 1)
+    async with api_client(alice) as client:
+        await client.post(f"/trips/{trip_id}/favorite")
+        listed = (await client.get("/trips/list", params={"fields": "title"})).json()["data"]
+        paged = (await client.get("/trips/list", params={"fields": "title", "page_size": 5})).json()["list"]
+        favorites = (await client.post("/trips/favorite", params={"fields": "title,is_favorited"})).json()["data"]
+        full = (await client.get("/trips/list")).json()["data"]
+    assert [set(row) for row in listed + paged] == [{"id", "title"}] * 2
+    assert favorites == [{"id": trip_id, "title": "t0", "is_favorited": True}]
+    assert "T" in full[0]["created_at"]
+
+
+async def test_search_rows_dedupe_like_the_mysql_collation(db):
+    alice = await create_user(db, "alice")
+    item = trip_item(cities=("Kyoto", " kyoto", "Zürich", "Zurich"), tags=("Food", "food "))
+    result = await TripService.bulk_create_trips(db, [item], alice.id, batch_size=10)
+    assert result["errors"] == []
+    assert sorted((await db.execute(select(TripCity.city))).scalars()) == ["Kyoto", "Zürich"]
+    assert list((await db.execute(select(TripTag.tag))).scalars()) == ["Food"]
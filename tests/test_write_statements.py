@@ -0,0 +1,51 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.database import utcnow
+from app.routers.v1.trip.schemas import TripCreate
+from app.routers.v1.user.schemas import UserCreate
+from app.services.auth import security
+from app.services.trip import TripService
+from app.services.user.user import User
+from app.utils.query_stats import query_budget
+
+pytestmark = pytest.mark.anyio
+
+
+class FastHasher:
+    """测试环境的 passlib / bcrypt 版本不兼容，注册时用固定哈希代替"""
+
+    async def hash(self, password) -> str:
+        return "hashed"
+
+
+def assert_recent_utc(value: datetime):
+    assert abs(utcnow() - value) < timedelta(minutes=1)
+
+
+async def test_create_trip_statements(db):
+    # INSERT trips + INSERT trip_cities + INSERT trip_tags，写入后不再回查
+    with query_budget(max_statements=3) as stats:
+        trip = await TripService.create_trip(db, TripCreate(
+            title="statement count",
+            start_date=date.today(),
+            duration=1,
+            cities=[{"name": "Kyoto"}],
+            style_tags=["foodie"],
+            settings={},
+        ))
+        assert trip.id is not None
+        assert_recent_utc(trip.created_at)
+    assert stats.statements == 3
+
+
+async def test_register_user_statements(db, monkeypatch):
+    monkeypatch.setattr(security, "password_hasher", FastHasher())
+    # 查重 SELECT + INSERT users
+    with query_budget(max_statements=2) as stats:
+        user = await User().register_user(UserCreate(username="alice@example.com", password="password"), db)
+        assert user.id is not None and user.is_active
+        assert_recent_utc(user.created_at)
+        assert_recent_utc(user.updated_at)
+    assert stats.statements == 2